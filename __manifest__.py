@@ -1,6 +1,6 @@
 {
     'name': 'LMS Marketplace',
-    'version': '0.0.1',
+    'version': '0.0.2',
     'category': 'Education',
     'summary': 'Comprehensive Learning Management System with Marketplace',
     'description': """
@@ -39,6 +39,8 @@
         # 'data/gamification_data.xml',
         # 'data/compliance_rules.xml',
         # 'data/payment_gateways.xml',
+        'data/lms_cron.xml',
+        'data/lms_certificate_data.xml',
         
 
          # Partner and User related views
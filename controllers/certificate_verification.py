@@ -0,0 +1,83 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after a fixed TTL
+
+    Used per worker process for certificate lookups: a hit, including a
+    cached miss, is answered without touching the database.
+    """
+
+    def __init__(self, max_size=5000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def __contains__(self, key):
+        marker = object()
+        return self.get(key, marker) is not marker
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets, themselves kept in a bounded LRU
+
+    Each key (a client IP) may spend `capacity` tokens in a burst, refilled
+    at `rate` tokens per second.
+    """
+
+    def __init__(self, capacity=20, rate=0.2, max_keys=10000):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refill(self, key, now):
+        tokens, last = self._buckets.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - last) * self.rate)
+        return tokens
+
+    def allowed(self, key):
+        """Whether the key still has a token, without spending it"""
+        with self._lock:
+            return self._refill(key, time.monotonic()) >= 1
+
+    def consume(self, key):
+        """Spend a token; return False when the bucket is empty"""
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refill(key, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
@@ -1,8 +1,20 @@
 from odoo import http
 from odoo.http import request
+from odoo.exceptions import UserError
 from odoo.addons.website.controllers.main import Website
 import json
 import base64
+import tempfile
+from werkzeug.wsgi import wrap_file
+
+from .certificate_verification import TTLCache, TokenBucketLimiter
+
+# Per-worker caches for the public certificate verification endpoints.
+# Misses are cached too, and only misses cost tokens: a scan of random
+# hashes is throttled while legitimate verifications stay fast.
+_certificate_cache = TTLCache(max_size=5000, ttl=300)
+_verification_limiter = TokenBucketLimiter(capacity=20, rate=0.2)
+_MISSING = object()
 
 class LMSWebsite(Website):
     
@@ -154,8 +166,11 @@ class LMSWebsite(Website):
         if not enrollment:
             return request.redirect('/lms/courses')
         
-        # Generate quiz attempt
-        attempt = quiz.action_generate_quiz_attempt(enrollment)
+        # Resume the open attempt or start the next one
+        try:
+            attempt = quiz.action_generate_quiz_attempt(enrollment)
+        except UserError:
+            return request.redirect('/lms/learning/%s' % quiz.course_id.id)
         
         values = {
             'quiz': quiz,
@@ -167,21 +182,23 @@ class LMSWebsite(Website):
     @http.route('/lms/quiz/submit', type='json', auth="user", website=True)
     def lms_quiz_submit(self, attempt_id, answers, **kwargs):
         attempt = request.env['lms.quiz.attempt'].browse(attempt_id)
+        if not attempt.exists() or attempt.student_id != request.env.user.partner_id:
+            return {'success': False, 'error': 'Attempt not found'}
+        # Ownership checked above; students cannot write attempt answers
+        attempt = attempt.sudo()
+        
+        # The server-side deadline is authoritative, not the page countdown
+        try:
+            attempt._check_submission_deadline()
+        except UserError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'redirect_url': '/lms/learning/%s' % attempt.enrollment_id.course_id.id
+            }
         
         # Update student answers
-        for question_id, answer_data in answers.items():
-            attempt_question = attempt.questions.filtered(
-                lambda q: q.question_id.id == int(question_id)
-            )
-            if attempt_question:
-                if answer_data.get('type') == 'multiple_choice':
-                    attempt_question.write({
-                        'student_answer_ids': [(6, 0, answer_data.get('answers', []))]
-                    })
-                elif answer_data.get('type') == 'essay':
-                    attempt_question.write({
-                        'student_essay_answer': answer_data.get('answer', '')
-                    })
+        attempt.write({'questions': attempt._prepare_answer_commands(answers)})
         
         # Submit and grade quiz
         attempt.action_submit_quiz()
@@ -193,20 +210,150 @@ class LMSWebsite(Website):
             'redirect_url': '/lms/learning/%s' % attempt.enrollment_id.course_id.id
         }
     
+    @http.route('/lms/quiz/autosave', type='json', auth="user", website=True)
+    def lms_quiz_autosave(self, attempt_id, seq, answers, **kwargs):
+        attempt = request.env['lms.quiz.attempt'].browse(attempt_id)
+        if not attempt.exists() or attempt.student_id != request.env.user.partner_id:
+            return {'success': False, 'error': 'Attempt not found'}
+        
+        try:
+            # Ownership checked above; students cannot write attempt answers
+            result = attempt.sudo().action_autosave(int(seq), answers)
+        except UserError as e:
+            return {'success': False, 'error': str(e)}
+        
+        # A stale save was not applied: the client resends with a newer seq
+        result['success'] = not result.get('stale')
+        return result
+    
+    @http.route('/lms/grading/batch', type='json', auth="user")
+    def lms_grading_batch(self, grades, **kwargs):
+        graded = request.env['lms.quiz.attempt.question'].grade_batch(grades)
+        return {'success': True, 'graded': graded}
+    
+    @http.route('/lms/review/due', type='json', auth="user", website=True)
+    def lms_review_due(self, limit=20, **kwargs):
+        # Only the caller's own items are returned; students cannot read
+        # questions, so they are read as superuser, without is_correct
+        items = request.env['lms.review.item'].get_due_items(limit=min(int(limit), 100))
+        return {
+            'success': True,
+            'items': [{
+                'id': item.id,
+                'question': item.question_id.name,
+                'question_type': item.question_id.question_type,
+                'answers': [{'id': answer.id, 'text': answer.text} for answer in item.question_id.answers],
+            } for item in items.sudo()],
+        }
+    
+    @http.route('/lms/review/submit', type='json', auth="user", website=True)
+    def lms_review_submit(self, reviews, **kwargs):
+        results = request.env['lms.review.item'].review_batch(reviews)
+        return {'success': True, 'results': results}
+    
+    @http.route('/lms/quiz/<int:quiz_id>/export/<string:file_format>', type='http', auth="user")
+    def lms_quiz_export(self, quiz_id, file_format, **kwargs):
+        quiz = request.env['lms.quiz'].browse(quiz_id)
+        if not quiz.exists():
+            return request.not_found()
+        
+        extensions = {'csv': 'csv', 'gift': 'txt', 'qti': 'zip'}
+        content_types = {'csv': 'text/csv', 'gift': 'text/plain', 'qti': 'application/zip'}
+        if file_format not in extensions:
+            return request.not_found()
+        
+        # Chunks are spooled while the cursor is open, then streamed from disk
+        spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        for chunk in request.env['lms.question.bank'].export_questions(quiz.id, file_format):
+            spool.write(chunk)
+        spool.seek(0)
+        
+        filename = 'quiz_%s.%s' % (quiz.id, extensions[file_format])
+        return request.make_response(
+            wrap_file(request.httprequest.environ, spool),
+            headers=[
+                ('Content-Type', content_types[file_format]),
+                ('Content-Disposition', 'attachment; filename="%s"' % filename),
+            ]
+        )
+    
+    def _lookup_certificate(self, verify_hash):
+        """Cached verification lookup; returns (payload, throttled)"""
+        payload = _certificate_cache.get(verify_hash, _MISSING)
+        if payload is not _MISSING:
+            return payload, False
+        
+        client_ip = request.httprequest.remote_addr
+        if not _verification_limiter.allowed(client_ip):
+            return None, True
+        
+        payload = request.env['lms.certificate']._get_verification_payload(verify_hash)
+        _certificate_cache.set(verify_hash, payload)
+        if payload is None:
+            _verification_limiter.consume(client_ip)
+        return payload, False
+    
+    @http.route('/lms/compliance/report/<int:rule_id>', type='http', auth="user")
+    def lms_compliance_report(self, rule_id, file_format='csv', **kwargs):
+        rule = request.env['lms.compliance.rule'].browse(rule_id)
+        if not rule.exists() or file_format not in ('csv', 'xlsx'):
+            return request.not_found()
+        
+        content_types = {
+            'csv': 'text/csv',
+            'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        }
+        spool = rule._export_compliance_report(file_format)
+        filename = 'compliance_%s.%s' % (rule.code or rule.id, file_format)
+        return request.make_response(
+            wrap_file(request.httprequest.environ, spool),
+            headers=[
+                ('Content-Type', content_types[file_format]),
+                ('Content-Disposition', 'attachment; filename="%s"' % filename),
+            ]
+        )
+    
     @http.route('/lms/certificate/<string:verify_hash>', type='http', auth="public", website=True)
     def lms_certificate_verify(self, verify_hash, **kwargs):
-        certificate = request.env['lms.certificate'].search([
-            ('verification_hash', '=', verify_hash)
-        ], limit=1)
+        payload, throttled = self._lookup_certificate(verify_hash)
+        if throttled:
+            return request.make_response(
+                'Too many verification attempts, please retry later.',
+                headers=[('Retry-After', '60')],
+                status=429
+            )
         
-        if not certificate:
+        if not payload:
             return request.render("lms_marketplace.certificate_not_found")
         
         values = {
-            'certificate': certificate,
+            'certificate': request.env['lms.certificate'].sudo().browse(payload['id']),
         }
         return request.render("lms_marketplace.certificate_verify_page", values)
     
+    @http.route('/lms/certificate/<string:verify_hash>/json', type='http', auth="public", methods=['GET'])
+    def lms_certificate_verify_json(self, verify_hash, **kwargs):
+        payload, throttled = self._lookup_certificate(verify_hash)
+        if throttled:
+            return request.make_json_response(
+                {'valid': False, 'error': 'rate_limited'},
+                headers=[('Retry-After', '60')],
+                status=429
+            )
+        if not payload:
+            return request.make_json_response({'valid': False, 'error': 'not_found'}, status=404)
+        
+        result = {key: value for key, value in payload.items() if key != 'id'}
+        result['valid'] = result.pop('is_valid')
+        return request.make_json_response(result, headers=[('Cache-Control', 'public, max-age=300')])
+    
+    @http.route('/lms/certificate/signed/<string:token>', type='http', auth="public", methods=['GET'])
+    def lms_certificate_verify_signed(self, token, **kwargs):
+        # Signature and expiry are checked in memory; only the revocation
+        # list is read from the database
+        result = request.env['lms.certificate'].sudo()._verify_signed_token(token)
+        return request.make_json_response(result, status=200 if result['valid'] else 400)
+    
     @http.route('/lms/instructor/apply', type='http', auth="user", website=True)
     def lms_instructor_apply(self, **kwargs):
         partner = request.env.user.partner_id
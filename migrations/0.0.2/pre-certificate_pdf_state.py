@@ -0,0 +1,26 @@
+def migrate(cr, version):
+    """Create pdf_state before the ORM does, without queueing existing certificates
+
+    The field defaults to 'queued' for new certificates; filled in by the
+    ORM on upgrade, that default would send every existing certificate to
+    the renderer. Certificates that already have a PDF are marked done,
+    the others as not generated.
+    """
+    if not version:
+        return
+
+    cr.execute("ALTER TABLE lms_certificate ADD COLUMN IF NOT EXISTS pdf_state VARCHAR")
+    cr.execute("""
+        UPDATE lms_certificate c
+           SET pdf_state = CASE
+                   WHEN EXISTS (
+                        SELECT 1
+                          FROM ir_attachment a
+                         WHERE a.res_model = 'lms.certificate'
+                           AND a.res_field = 'pdf_certificate'
+                           AND a.res_id = c.id
+                   ) THEN 'done'
+                   ELSE 'none'
+               END
+         WHERE c.pdf_state IS NULL
+    """)
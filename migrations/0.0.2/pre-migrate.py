@@ -0,0 +1,49 @@
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Make existing quiz attempts satisfy the new attempt constraints
+
+    Before the unique (quiz, enrollment, attempt_number) constraint and the
+    one-open-attempt index are created: close all but the latest open
+    attempt of each (quiz, enrollment), then renumber attempts in start
+    order.
+    """
+    if not version:
+        return
+
+    cr.execute("""
+        UPDATE lms_quiz_attempt a
+           SET state = 'submitted',
+               end_time = COALESCE(a.end_time, NOW() AT TIME ZONE 'UTC')
+          FROM (
+                SELECT id,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY quiz_id, enrollment_id
+                           ORDER BY start_time DESC NULLS LAST, id DESC
+                       ) AS position
+                  FROM lms_quiz_attempt
+                 WHERE state = 'in_progress'
+          ) open_attempts
+         WHERE a.id = open_attempts.id
+           AND open_attempts.position > 1
+    """)
+    _logger.info("Closed %d duplicate open quiz attempts", cr.rowcount)
+
+    cr.execute("""
+        UPDATE lms_quiz_attempt a
+           SET attempt_number = numbered.attempt_number
+          FROM (
+                SELECT id,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY quiz_id, enrollment_id
+                           ORDER BY start_time NULLS FIRST, id
+                       ) AS attempt_number
+                  FROM lms_quiz_attempt
+          ) numbered
+         WHERE a.id = numbered.id
+           AND a.attempt_number IS DISTINCT FROM numbered.attempt_number
+    """)
+    _logger.info("Renumbered %d quiz attempts", cr.rowcount)
@@ -4,12 +4,27 @@ from . import lms_compliance_rule
 from . import lms_module
 from . import lms_content
 from . import lms_quiz
+from . import lms_quiz_analysis
+from . import lms_quiz_exam
+from . import lms_question_bank
+from . import lms_grading
+from . import lms_essay_similarity
+from . import lms_review
 from . import lms_enrollment
 from . import lms_certificate
+from . import lms_certificate_signing
+from . import lms_certificate_reissue
+from . import lms_compliance_status
+from . import lms_compliance_pass
+from . import lms_compliance_reminder
+from . import lms_compliance_snapshot
+from . import lms_compliance_simulation
+from . import lms_compliance_renewal
 from . import lms_analytics
 from . import lms_marketplace
 from . import lms_payment
 from . import lms_corporate
+from . import lms_corporate_enrollment
 from . import lms_advanced
 from . import lms_achievement
 from . import lms_live_session
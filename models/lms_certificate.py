@@ -1,7 +1,56 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+from odoo.addons.base.models.ir_actions_report import _get_wkhtmltopdf_bin
+from odoo.tools.mimetypes import guess_mimetype
+from concurrent.futures import ThreadPoolExecutor
+from markupsafe import escape
+from datetime import timedelta
+import base64
 import hashlib
+import logging
+import os
+import re
+import subprocess
 import uuid
 
+_logger = logging.getLogger(__name__)
+
+# Certificates rendered per transaction by the rendering job
+CERTIFICATE_RENDER_BATCH = 200
+
+PLACEHOLDER_RE = re.compile(r'{{\s*(\w+)\s*}}')
+
+DEFAULT_CERTIFICATE_HTML = """
+<div style="text-align: center; padding: 60px;">
+    <h1>Certificate of Completion</h1>
+    <p>This is to certify that</p>
+    <h2>{{ student_name }}</h2>
+    <p>has successfully completed the course</p>
+    <h2>{{ course_name }}</h2>
+    <p>with a final score of {{ score }}% (grade {{ grade }})</p>
+    <p>Certificate {{ certificate_number }} issued on {{ issue_date }}</p>
+    <p>Verify at {{ verification_url }}</p>
+    {{ signature }}
+    {{ qr_code }}
+</div>
+"""
+
+
+def _render_pdf(html):
+    """Run one wkhtmltopdf process on an HTML document and return the PDF"""
+    process = subprocess.run(
+        [_get_wkhtmltopdf_bin(), '--quiet', '--encoding', 'utf-8',
+         '--page-size', 'A4', '--orientation', 'Landscape',
+         '--margin-top', '0', '--margin-bottom', '0', '--margin-left', '0', '--margin-right', '0',
+         '-', '-'],
+        input=html.encode(),
+        capture_output=True,
+        timeout=120,
+    )
+    if process.returncode not in (0, 1) or not process.stdout:
+        raise RuntimeError(process.stderr.decode(errors='replace')[-500:])
+    return process.stdout
+
 class LMSCertificate(models.Model):
     _name = 'lms.certificate'
     _description = 'LMS Certificate'
@@ -39,8 +88,37 @@ class LMSCertificate(models.Model):
     
     pdf_certificate = fields.Binary(string='PDF Certificate')
     pdf_filename = fields.Char(string='PDF Filename')
+    pdf_state = fields.Selection([
+        ('none', 'Not Generated'),
+        ('queued', 'Queued'),
+        ('done', 'Generated'),
+        ('failed', 'Failed'),
+    ], string='PDF Status', default='queued', index=True, readonly=True)
+    pdf_content_hash = fields.Char(
+        string='PDF Content Hash',
+        readonly=True,
+        help='SHA-256 of the document the current PDF was rendered from'
+    )
+    
+    is_valid = fields.Boolean(
+        string='Is Valid',
+        compute='_compute_is_valid',
+        store=True,
+        help='Maintained on write and by the nightly expiry sweep'
+    )
+    
+    _sql_constraints = [
+        ('verification_hash_unique', 'UNIQUE(verification_hash)',
+         'The verification hash must be unique.'),
+    ]
     
-    is_valid = fields.Boolean(string='Is Valid', compute='_compute_is_valid')
+    def init(self):
+        # Serves both the expiry sweep and "expiring within N days" lookups
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS lms_certificate_valid_expiry_idx
+                ON lms_certificate (expiry_date)
+             WHERE is_valid AND expiry_date IS NOT NULL
+        """)
     
     @api.depends('student_id', 'course_id')
     def _compute_display_name(self):
@@ -78,10 +156,172 @@ class LMSCertificate(models.Model):
             else:
                 certificate.is_valid = True
     
+    @api.model
+    def _cron_expire_certificates(self):
+        """Scheduled job: flip certificates past their expiry date"""
+        expired = self._expire_certificates()
+        _logger.info("Certificate expiry sweep: %d certificates expired", len(expired))
+    
+    @api.model
+    def _expire_certificates(self):
+        """Mark valid certificates whose expiry date has passed as invalid
+
+        One UPDATE driven by the partial expiry index; returns the
+        certificates that were flipped.
+        """
+        self.flush_model(['is_valid', 'expiry_date'])
+        self.env.cr.execute("""
+            UPDATE lms_certificate
+               SET is_valid = FALSE,
+                   write_date = %s
+             WHERE is_valid
+               AND expiry_date IS NOT NULL
+               AND expiry_date <= %s
+         RETURNING id
+        """, [fields.Datetime.now(), fields.Datetime.now()])
+        expired = self.browse([row[0] for row in self.env.cr.fetchall()])
+        self.invalidate_model(['is_valid', 'write_date'])
+        return expired
+    
+    @api.model
+    def _get_expiring_certificates(self, days=30, course_ids=None):
+        """Valid certificates expiring within the next `days` days"""
+        now = fields.Datetime.now()
+        domain = [
+            ('is_valid', '=', True),
+            ('expiry_date', '>', now),
+            ('expiry_date', '<=', now + timedelta(days=days)),
+        ]
+        if course_ids:
+            domain.append(('course_id', 'in', course_ids))
+        return self.search(domain, order='expiry_date')
+    
     def action_generate_pdf(self):
-        """Generate PDF certificate"""
-        # Implementation for PDF generation using reportlab or wkhtmltopdf
-        pass
+        """Queue the PDF of the selected certificates for rendering"""
+        self.write({'pdf_state': 'queued'})
+        self.env.ref('lms_marketplace.ir_cron_lms_render_certificates')._trigger()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Certificate PDF'),
+                'message': _('%s certificate(s) queued for rendering.') % len(self),
+                'type': 'info',
+            }
+        }
+    
+    @api.model
+    def _cron_render_certificates(self):
+        """Scheduled job: render queued certificate PDFs in batches"""
+        while True:
+            certificates = self.search([('pdf_state', '=', 'queued')], limit=CERTIFICATE_RENDER_BATCH)
+            if not certificates:
+                break
+            certificates._render_pdf_batch()
+            self.env.cr.commit()
+            self.env.invalidate_all()
+    
+    def _render_pdf_batch(self, skip_unchanged=False, errors=None):
+        """Render the PDFs of a batch of certificates in parallel
+
+        Templates are compiled once and reused from the cache; the HTML
+        documents are prepared with the cursor, then handed to a pool of
+        wkhtmltopdf processes that never touch the database. With
+        skip_unchanged, certificates whose document hashes to the same
+        content as their current PDF are left alone. A certificate keeps its
+        previous PDF until the new one is fully rendered. Failing
+        certificates are marked 'failed', unless an errors dict is given:
+        their state is then kept and the dict maps each of them to its error.
+
+        Returns the number of rendered, skipped and failed certificates.
+        """
+        to_render = []
+        skipped = failed = 0
+        for certificate in self:
+            try:
+                with self.env.cr.savepoint():
+                    template = certificate.template_id
+                    parts = template._get_compiled_template()
+                    html = template._fill_compiled_template(parts, certificate._get_render_values())
+            except Exception as e:
+                # One broken certificate or template must not block the batch
+                _logger.warning("Certificate %s could not be prepared: %s", certificate.certificate_number, e)
+                certificate._set_render_failure(e, errors)
+                failed += 1
+                continue
+            content_hash = hashlib.sha256(html.encode()).hexdigest()
+            # The hash is only set along with a rendered PDF: the binary itself is not loaded
+            if skip_unchanged and certificate.pdf_content_hash == content_hash:
+                skipped += 1
+                continue
+            to_render.append((certificate, html, content_hash))
+        
+        workers = int(self.env['ir.config_parameter'].sudo().get_param(
+            'lms_marketplace.certificate_render_workers', os.cpu_count() or 2
+        ))
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = [executor.submit(_render_pdf, html) for _certificate, html, _hash in to_render]
+        
+        rendered = 0
+        for (certificate, _html, content_hash), future in zip(to_render, futures):
+            try:
+                pdf = future.result()
+            except Exception as e:
+                _logger.warning("Certificate %s could not be rendered: %s", certificate.certificate_number, e)
+                certificate._set_render_failure(e, errors)
+                failed += 1
+                continue
+            certificate.write({
+                'pdf_certificate': base64.b64encode(pdf),
+                'pdf_filename': '%s.pdf' % certificate.certificate_number,
+                'pdf_content_hash': content_hash,
+                'pdf_state': 'done',
+            })
+            rendered += 1
+        return rendered, skipped, failed
+
+    def _set_render_failure(self, error, errors=None):
+        self.ensure_one()
+        if errors is None:
+            self.pdf_state = 'failed'
+        else:
+            errors[self] = str(error)
+    
+    def _get_render_values(self):
+        self.ensure_one()
+        base_url = self.get_base_url()
+        return {
+            'student_name': self.student_id.name,
+            'course_name': self.course_id.name,
+            'certificate_number': self.certificate_number,
+            'issue_date': fields.Date.to_string(self.issue_date),
+            'expiry_date': fields.Date.to_string(self.expiry_date) if self.expiry_date else _('No Expiry'),
+            'score': '%.1f' % self.score,
+            'grade': self.grade,
+            'instructor_name': self.course_id.instructor_id.name or '',
+            'verification_url': '%s/lms/certificate/%s' % (base_url, self.verification_hash),
+        }
+    
+    @api.model
+    def _get_verification_payload(self, verify_hash):
+        """Public facts about the certificate holding this hash, or None
+
+        The lookup goes through the unique index on verification_hash; the
+        result is small and safe to cache by the verification endpoints.
+        """
+        certificate = self.sudo().search([('verification_hash', '=', verify_hash)], limit=1)
+        if not certificate:
+            return None
+        return {
+            'id': certificate.id,
+            'certificate_number': certificate.certificate_number,
+            'student': certificate.student_id.name,
+            'course': certificate.course_id.name,
+            'issue_date': fields.Date.to_string(certificate.issue_date),
+            'expiry_date': fields.Date.to_string(certificate.expiry_date) if certificate.expiry_date else None,
+            'grade': certificate.grade,
+            'is_valid': certificate.is_valid,
+        }
     
     def action_verify_certificate(self):
         """Verify certificate authenticity"""
@@ -102,6 +342,56 @@ class LMSCertificateTemplate(models.Model):
     background_image = fields.Binary(string='Background Image')
     signature_image = fields.Binary(string='Signature Image')
     
-    template_html = fields.Html(string='HTML Template')
+    template_html = fields.Html(
+        string='HTML Template',
+        sanitize=False,
+        help='Use {{ student_name }}, {{ course_name }}, {{ certificate_number }}, '
+             '{{ issue_date }}, {{ expiry_date }}, {{ score }}, {{ grade }}, '
+             '{{ instructor_name }}, {{ verification_url }}, {{ qr_code }} and {{ signature }} as placeholders'
+    )
+    
+    is_active = fields.Boolean(string='Active', default=True)
+    
+    @tools.ormcache('self.id', 'self.write_date')
+    def _get_compiled_template(self):
+        """Split the template into literal chunks and placeholder names
+
+        Images are inlined once here, so rendering a certificate is only a
+        join. The write date is part of the cache key: editing the template
+        recompiles it.
+        """
+        self.ensure_one()
+        html = str(self.template_html or '') or DEFAULT_CERTIFICATE_HTML
+        signature = ''
+        if self.signature_image:
+            signature = '<img src="%s" style="max-height: 80px;"/>' % self._image_data_uri(self.signature_image)
+        body_style = 'margin: 0;'
+        if self.background_image:
+            body_style += 'background: url(%s) no-repeat center / cover;' % self._image_data_uri(self.background_image)
+        
+        document = (
+            '<!DOCTYPE html><html><head><meta charset="utf-8"/></head>'
+            '<body style="%s">%s</body></html>' % (body_style, html)
+        )
+        parts = PLACEHOLDER_RE.split(document.replace('{{ signature }}', signature).replace('{{signature}}', signature))
+        # Even indexes are literal HTML, odd indexes placeholder names
+        return tuple(parts)
+    
+    @api.model
+    def _fill_compiled_template(self, parts, values):
+        return ''.join(
+            part if i % 2 == 0 else str(escape(values.get(part, '')))
+            for i, part in enumerate(parts)
+        )
+    
+    @api.model
+    def _image_data_uri(self, image):
+        data = base64.b64decode(image)
+        return 'data:%s;base64,%s' % (guess_mimetype(data), image.decode() if isinstance(image, bytes) else image)
     
-    is_active = fields.Boolean(string='Active', default=True)
\ No newline at end of file
+    @api.model
+    def _get_default_template(self):
+        template = self.search([('is_active', '=', True)], limit=1)
+        if not template:
+            raise UserError(_("Please configure an active certificate template."))
+        return template
@@ -0,0 +1,146 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Certificates re-rendered per transaction by a re-issue job
+REISSUE_CHUNK_SIZE = 500
+
+
+class LMSCertificateReissue(models.Model):
+    _name = 'lms.certificate.reissue'
+    _description = 'LMS Certificate Re-issue Job'
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char(string='Description', required=True,
+                       default=lambda self: _('Certificate re-issue'))
+    template_id = fields.Many2one('lms.certificate.template', string='Template', required=True)
+    date_from = fields.Datetime(string='Issued From')
+    date_to = fields.Datetime(string='Issued To')
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('cancelled', 'Cancelled'),
+    ], string='Status', default='draft', required=True)
+
+    # Resume point: certificates are processed in id order
+    last_certificate_id = fields.Integer(string='Last Processed Certificate', readonly=True)
+
+    total_count = fields.Integer(string='Certificates', readonly=True)
+    processed_count = fields.Integer(string='Processed', readonly=True)
+    rendered_count = fields.Integer(string='Re-rendered', readonly=True)
+    skipped_count = fields.Integer(string='Unchanged', readonly=True)
+    failed_count = fields.Integer(string='Failed', readonly=True)
+    run_seconds = fields.Float(string='Rendering Time (s)', readonly=True)
+    started_at = fields.Datetime(string='Started', readonly=True)
+    finished_at = fields.Datetime(string='Finished', readonly=True)
+    failure_ids = fields.One2many('lms.certificate.reissue.failure', 'job_id', string='Failures', readonly=True)
+
+    progress = fields.Float(string='Progress (%)', compute='_compute_throughput')
+    throughput = fields.Float(string='Certificates / Minute', compute='_compute_throughput')
+
+    @api.depends('processed_count', 'total_count', 'run_seconds')
+    def _compute_throughput(self):
+        for job in self:
+            job.progress = job.total_count and job.processed_count * 100.0 / job.total_count
+            job.throughput = job.run_seconds and job.processed_count * 60.0 / job.run_seconds
+
+    @api.constrains('date_from', 'date_to')
+    def _check_dates(self):
+        for job in self:
+            if job.date_from and job.date_to and job.date_from > job.date_to:
+                raise ValidationError(_("The start date must be before the end date."))
+
+    def _get_certificate_domain(self):
+        self.ensure_one()
+        domain = [('template_id', '=', self.template_id.id)]
+        if self.date_from:
+            domain.append(('issue_date', '>=', self.date_from))
+        if self.date_to:
+            domain.append(('issue_date', '<=', self.date_to))
+        return domain
+
+    def action_start(self):
+        for job in self.filtered(lambda j: j.state in ('draft', 'cancelled')):
+            job.write({
+                'state': 'running',
+                'total_count': self.env['lms.certificate'].search_count(job._get_certificate_domain()),
+                'started_at': job.started_at or fields.Datetime.now(),
+            })
+        self.env.ref('lms_marketplace.ir_cron_lms_certificate_reissue')._trigger()
+
+    def action_cancel(self):
+        self.filtered(lambda j: j.state == 'running').write({'state': 'cancelled'})
+
+    @api.model
+    def _cron_run_reissue_jobs(self):
+        """Scheduled job: advance running re-issue jobs chunk by chunk
+
+        Progress is committed with every chunk, so an interrupted job picks
+        up after the last certificate it finished.
+        """
+        for job in self.search([('state', '=', 'running')], order='id'):
+            job._run()
+
+    def _run(self):
+        self.ensure_one()
+        Certificate = self.env['lms.certificate']
+        while True:
+            self.env.cr.execute(
+                "SELECT state FROM lms_certificate_reissue WHERE id = %s FOR UPDATE",
+                [self.id]
+            )
+            if self.env.cr.fetchone()[0] != 'running':
+                # Cancelled in the meantime
+                self.env.cr.commit()
+                return
+
+            certificates = Certificate.search(
+                self._get_certificate_domain() + [('id', '>', self.last_certificate_id)],
+                order='id',
+                limit=REISSUE_CHUNK_SIZE
+            )
+            if not certificates:
+                self.write({'state': 'done', 'finished_at': fields.Datetime.now()})
+                self.env.cr.commit()
+                _logger.info(
+                    "Certificate re-issue %s done: %d rendered, %d unchanged, %d failed, %.0f/min",
+                    self.id, self.rendered_count, self.skipped_count, self.failed_count, self.throughput
+                )
+                return
+            # Release the job row before rendering, so the job can be
+            # cancelled or viewed while the chunk renders
+            self.env.cr.commit()
+
+            started = time.monotonic()
+            errors = {}
+            rendered, skipped, failed = certificates._render_pdf_batch(skip_unchanged=True, errors=errors)
+            self.write({
+                'last_certificate_id': certificates[-1].id,
+                'processed_count': self.processed_count + len(certificates),
+                'rendered_count': self.rendered_count + rendered,
+                'skipped_count': self.skipped_count + skipped,
+                'failed_count': self.failed_count + failed,
+                'run_seconds': self.run_seconds + time.monotonic() - started,
+                # Failed certificates keep their previous PDF and state
+                'failure_ids': [(0, 0, {
+                    'certificate_id': certificate.id,
+                    'error': error,
+                }) for certificate, error in errors.items()],
+            })
+            # The new PDFs and the resume point become visible together
+            self.env.cr.commit()
+            self.env.invalidate_all()
+
+
+class LMSCertificateReissueFailure(models.Model):
+    _name = 'lms.certificate.reissue.failure'
+    _description = 'LMS Certificate Re-issue Failure'
+    _order = 'id'
+
+    job_id = fields.Many2one('lms.certificate.reissue', string='Job', required=True, ondelete='cascade')
+    certificate_id = fields.Many2one('lms.certificate', string='Certificate', required=True, ondelete='cascade')
+    error = fields.Text(string='Error', readonly=True)
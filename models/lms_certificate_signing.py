@@ -0,0 +1,243 @@
+from odoo import models, fields, api, tools
+from odoo.tools import split_every
+from markupsafe import Markup
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+
+_logger = logging.getLogger(__name__)
+
+# Certificates re-signed per transaction
+RESIGN_CHUNK_SIZE = 500
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+class LMSCertificateSigningKey(models.Model):
+    _name = 'lms.certificate.signing.key'
+    _description = 'LMS Certificate Signing Key'
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char(string='Key ID', required=True, readonly=True,
+                       default=lambda self: secrets.token_hex(4))
+    secret = fields.Char(string='Secret', required=True, readonly=True,
+                         default=lambda self: secrets.token_urlsafe(32),
+                         groups='lms_marketplace.group_lms_manager')
+    state = fields.Selection([
+        ('active', 'Signing'),
+        ('retired', 'Verify Only'),
+        ('revoked', 'Revoked'),
+    ], string='Status', default='active', required=True)
+
+    _sql_constraints = [
+        ('name_unique', 'UNIQUE(name)', 'Key IDs must be unique.'),
+    ]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        keys = super().create(vals_list)
+        self.clear_caches()
+        return keys
+
+    def write(self, vals):
+        result = super().write(vals)
+        self.clear_caches()
+        if vals.get('state') in ('active', 'revoked'):
+            # Tokens of a revoked key no longer verify, and certificates
+            # issued while no key was active are unsigned: sign them again
+            self.env.ref('lms_marketplace.ir_cron_lms_certificate_resign')._trigger()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.clear_caches()
+        return result
+
+    @api.model
+    def action_rotate_key(self):
+        """Start signing with a fresh key; older tokens keep verifying"""
+        self.search([('state', '=', 'active')]).write({'state': 'retired'})
+        key = self.create({})
+        self.env.ref('lms_marketplace.ir_cron_lms_certificate_resign')._trigger()
+        return key
+
+    @api.model
+    @tools.ormcache()
+    def _get_keys(self):
+        """(signing key id, {key id: secret}) of the keys still trusted"""
+        keys = self.sudo().search([('state', 'in', ('active', 'retired'))])
+        signing = keys.filtered(lambda key: key.state == 'active')[:1]
+        return signing.name, {key.name: key.secret.encode() for key in keys}
+
+    @api.model
+    def _sign(self, payload):
+        """Compact token 'kid.payload.signature' for a dict payload
+
+        Returns False when no key is active: the certificate is issued
+        unsigned and signed by the re-sign job once a key exists.
+        """
+        kid, secrets_by_kid = self._get_keys()
+        if not kid:
+            return False
+        body = _b64encode(json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode())
+        signing_input = ('%s.%s' % (kid, body)).encode()
+        signature = hmac.new(secrets_by_kid[kid], signing_input, hashlib.sha256).digest()
+        return '%s.%s.%s' % (kid, body, _b64encode(signature))
+
+    @api.model
+    def _verify(self, token):
+        """Decoded payload of a token whose signature checks out, else None
+
+        Only the in-memory key set is used: no database access.
+        """
+        try:
+            kid, body, signature = token.split('.')
+            secret = self._get_keys()[1].get(kid)
+            if not secret:
+                return None
+            expected = hmac.new(secret, ('%s.%s' % (kid, body)).encode(), hashlib.sha256).digest()
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                return None
+            return json.loads(_b64decode(body))
+        except (ValueError, TypeError):
+            return None
+
+
+class LMSCertificateSigned(models.Model):
+    _inherit = 'lms.certificate'
+
+    signed_token = fields.Char(
+        string='Signed Token',
+        compute='_compute_signed_token',
+        store=True,
+        help='Compact signed payload embedded as a QR code, verifiable without a database lookup'
+    )
+    revoked = fields.Boolean(string='Revoked', readonly=True)
+    revocation_date = fields.Datetime(string='Revoked On', readonly=True)
+    revocation_reason = fields.Char(string='Revocation Reason')
+
+    def init(self):
+        # The revocation list is the only lookup a signed token verification needs
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS lms_certificate_revoked_number_idx
+                ON lms_certificate (certificate_number)
+             WHERE revoked
+        """)
+
+    @api.depends('certificate_number', 'student_id.name', 'course_id.name', 'issue_date', 'expiry_date')
+    def _compute_signed_token(self):
+        SigningKey = self.env['lms.certificate.signing.key']
+        unsigned = 0
+        for certificate in self:
+            if not certificate.certificate_number or not certificate.issue_date:
+                certificate.signed_token = False
+                continue
+            payload = {
+                'n': certificate.certificate_number,
+                's': certificate.student_id.name,
+                'c': certificate.course_id.name,
+                'i': fields.Date.to_string(certificate.issue_date),
+            }
+            if certificate.expiry_date:
+                payload['e'] = fields.Date.to_string(certificate.expiry_date)
+            certificate.signed_token = SigningKey._sign(payload)
+            unsigned += not certificate.signed_token
+        if unsigned:
+            # Once per batch: an upgrade recomputes every certificate at once
+            _logger.warning(
+                "No active certificate signing key: %d certificates issued without a signed token",
+                unsigned
+            )
+
+    @api.model
+    def _cron_resign_certificates(self):
+        """Scheduled job: sign certificates with no token or a token of an untrusted key
+
+        Covers certificates issued while no key was active and those whose
+        key was revoked. PDFs already rendered with the old QR code are
+        queued for rendering again.
+        """
+        kid, secrets_by_kid = self.env['lms.certificate.signing.key']._get_keys()
+        if not kid:
+            return
+        self.flush_model(['signed_token', 'certificate_number', 'issue_date'])
+        self.env.cr.execute("""
+            SELECT id
+              FROM lms_certificate
+             WHERE certificate_number IS NOT NULL
+               AND issue_date IS NOT NULL
+               AND (signed_token IS NULL
+                    OR split_part(signed_token, '.', 1) != ALL(%s))
+          ORDER BY id
+        """, [list(secrets_by_kid)])
+        ids = [row[0] for row in self.env.cr.fetchall()]
+        for chunk in split_every(RESIGN_CHUNK_SIZE, ids, self.browse):
+            self.env.add_to_compute(self._fields['signed_token'], chunk)
+            chunk.flush_recordset(['signed_token'])
+            chunk.filtered(lambda c: c.pdf_state == 'done').write({'pdf_state': 'queued'})
+            self.env.cr.commit()
+            self.env.invalidate_all()
+        if ids:
+            _logger.info("Re-signed %d certificates", len(ids))
+            self.env.ref('lms_marketplace.ir_cron_lms_render_certificates')._trigger()
+
+    @api.depends('expiry_date', 'revoked')
+    def _compute_is_valid(self):
+        super()._compute_is_valid()
+        for certificate in self.filtered('revoked'):
+            certificate.is_valid = False
+
+    def action_revoke(self):
+        self.write({
+            'revoked': True,
+            'revocation_date': fields.Datetime.now(),
+        })
+
+    def _get_render_values(self):
+        values = super()._get_render_values()
+        values['qr_code'] = ''
+        if self.signed_token:
+            url = '%s/lms/certificate/signed/%s' % (self.get_base_url(), self.signed_token)
+            qr = self.env['ir.actions.report'].barcode('QR', url, width=180, height=180)
+            values['qr_code'] = Markup('<img src="data:image/png;base64,%s" style="width: 120px;"/>') % (
+                base64.b64encode(qr).decode()
+            )
+        return values
+
+    @api.model
+    def _verify_signed_token(self, token):
+        """Check a certificate token: signature, expiry, then revocation"""
+        payload = self.env['lms.certificate.signing.key']._verify(token)
+        if not payload:
+            return {'valid': False, 'error': 'invalid_signature'}
+
+        result = {
+            'certificate_number': payload.get('n'),
+            'student': payload.get('s'),
+            'course': payload.get('c'),
+            'issue_date': payload.get('i'),
+            'expiry_date': payload.get('e'),
+        }
+        if result['expiry_date'] and result['expiry_date'] < fields.Date.to_string(fields.Date.today()):
+            result.update(valid=False, error='expired')
+            return result
+
+        self.env.cr.execute(
+            "SELECT 1 FROM lms_certificate WHERE certificate_number = %s AND revoked LIMIT 1",
+            [result['certificate_number']]
+        )
+        if self.env.cr.fetchone():
+            result.update(valid=False, error='revoked')
+            return result
+
+        result['valid'] = True
+        return result
@@ -0,0 +1,171 @@
+from odoo import models, fields, api
+from collections import defaultdict
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Days between two scheduled evaluations of a rule
+COMPLIANCE_CHECK_INTERVAL = 7
+
+
+class LmsComplianceCompanyPass(models.Model):
+    _inherit = 'lms.compliance.rule'
+
+    @api.model
+    def _cron_company_compliance_pass(self, shard_count=1, shard_index=0):
+        """Scheduled job: evaluate due rules, one company per transaction
+
+        Several copies of the job can split the companies between them
+        with shard_count / shard_index (company id modulo shard_count).
+        """
+        today = fields.Date.today()
+        due_rules = self.search([
+            ('is_active', '=', True),
+            '|', ('next_check_date', '=', False), ('next_check_date', '<=', today),
+        ])
+        for company in due_rules.company_id:
+            if company.id % shard_count != shard_index:
+                continue
+            self._evaluate_company(company)
+            self.env.cr.commit()
+            self.env.invalidate_all()
+
+    @api.model
+    def _evaluate_company(self, company):
+        """Evaluate every active rule of a company in one pass
+
+        Employees, their enrollments in any required course and valid
+        exceptions are loaded once for the company; each rule's scope is
+        then resolved against in-memory department, job and category
+        indexes instead of reloading the same records per rule.
+        """
+        rules = self.search([('is_active', '=', True), ('company_id', '=', company.id)])
+        if not rules:
+            return
+
+        employees = self.env['hr.employee'].search_read(
+            [('company_id', '=', company.id)],
+            ['department_id', 'job_id', 'category_ids', 'user_id'],
+        )
+        user_partners = dict(
+            (user['id'], user['partner_id'][0])
+            for user in self.env['res.users'].with_context(active_test=False).search_read(
+                [('id', 'in', list({e['user_id'][0] for e in employees if e['user_id']}))],
+                ['partner_id'],
+            )
+        )
+
+        all_ids = set()
+        by_department = defaultdict(set)
+        by_job = defaultdict(set)
+        by_category = defaultdict(set)
+        employee_data = {}
+        for employee in employees:
+            employee_id = employee['id']
+            department_id = employee['department_id'] and employee['department_id'][0]
+            job_id = employee['job_id'] and employee['job_id'][0]
+            all_ids.add(employee_id)
+            by_department[department_id].add(employee_id)
+            by_job[job_id].add(employee_id)
+            for category_id in employee['category_ids']:
+                by_category[category_id].add(employee_id)
+            employee_data[employee_id] = {
+                'partner_id': user_partners.get(employee['user_id'] and employee['user_id'][0]),
+                'department_id': department_id or None,
+                'job_id': job_id or None,
+            }
+
+        enrollments = self._load_company_enrollments(
+            [data['partner_id'] for data in employee_data.values() if data['partner_id']],
+            (rules.course_id | rules.alternative_course_ids).ids,
+        )
+        exceptions = self._load_company_exceptions(rules, list(all_ids))
+
+        for rule in rules:
+            scope = set(all_ids)
+            if rule.department_ids:
+                scope &= set().union(*(by_department[d] for d in rule.department_ids.ids))
+            if rule.job_position_ids:
+                scope &= set().union(*(by_job[j] for j in rule.job_position_ids.ids))
+            if rule.employee_category_ids:
+                scope &= set().union(*(by_category[c] for c in rule.employee_category_ids.ids))
+
+            status = {}
+            courses = set(rule.course_id.ids + rule.alternative_course_ids.ids)
+            for employee_id in scope:
+                data = employee_data[employee_id]
+                match = rule._best_enrollment(enrollments.get(data['partner_id'], ()), courses)
+                status[employee_id] = dict(
+                    data,
+                    compliant=bool(match),
+                    enrollment_id=match and match['id'],
+                    expiry_date=match and match['expiry_date'],
+                    exception_until=exceptions.get((rule.id, employee_id), False),
+                )
+
+            self.env['lms.compliance.status'].search([
+                ('rule_id', '=', rule.id),
+                ('employee_id', 'not in', list(scope)),
+            ]).unlink()
+            if status:
+                rule._upsert_compliance_status(status)
+
+        rules.write({
+            'last_compliance_check': fields.Datetime.now(),
+            'next_check_date': fields.Date.today() + timedelta(days=COMPLIANCE_CHECK_INTERVAL),
+        })
+        _logger.info(
+            "Compliance pass for %s: %d rules over %d employees",
+            company.name, len(rules), len(all_ids)
+        )
+
+    @api.model
+    def _load_company_enrollments(self, partner_ids, course_ids):
+        """Completed enrollments of these learners in these courses, per learner"""
+        enrollments = defaultdict(list)
+        if not partner_ids or not course_ids:
+            return enrollments
+        self.env['lms.enrollment'].flush_model(['student_id', 'course_id', 'state', 'score', 'certificate_id'])
+        self.env['lms.certificate'].flush_model(['expiry_date', 'is_valid'])
+        self.env.cr.execute("""
+            SELECT en.student_id, en.id, en.course_id, en.score, en.certificate_id,
+                   c.expiry_date, c.is_valid
+              FROM lms_enrollment en
+         LEFT JOIN lms_certificate c ON c.id = en.certificate_id
+             WHERE en.student_id = ANY(%s)
+               AND en.course_id = ANY(%s)
+               AND en.state = 'completed'
+        """, [partner_ids, course_ids])
+        for partner_id, enrollment_id, course_id, score, certificate_id, expiry_date, is_valid in self.env.cr.fetchall():
+            enrollments[partner_id].append({
+                'id': enrollment_id,
+                'course_id': course_id,
+                'score': score or 0.0,
+                'certificate_id': certificate_id,
+                'expiry_date': expiry_date,
+                'is_valid': is_valid,
+            })
+        return enrollments
+
+    @api.model
+    def _load_company_exceptions(self, rules, employee_ids):
+        """End date of the valid exception of each (rule, employee)"""
+        return self.env['lms.compliance.exception']._get_exception_coverage(rules.ids, employee_ids)
+
+    def _best_enrollment(self, enrollments, courses):
+        """Same selection as _evaluate_compliance, on preloaded enrollments"""
+        self.ensure_one()
+        candidates = [
+            enrollment for enrollment in enrollments
+            if enrollment['course_id'] in courses
+            and not (self.min_score and enrollment['score'] < self.min_score)
+            and not (self.require_certificate and not enrollment['certificate_id'])
+            and not (self.renewal_required and enrollment['certificate_id'] and not enrollment['is_valid'])
+        ]
+        if not candidates:
+            return None
+        # No expiry first, then the latest expiry, then the latest enrollment
+        return max(candidates, key=lambda e: (
+            e['expiry_date'] is None, e['expiry_date'] or fields.Datetime.now(), e['id']
+        ))
@@ -0,0 +1,147 @@
+from odoo import models, fields, api, _
+from odoo.tools import split_every
+from collections import defaultdict
+from datetime import timedelta
+from markupsafe import Markup, escape
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Reminder mails created per batch
+REMINDER_BATCH_SIZE = 500
+
+
+class LmsComplianceReminder(models.Model):
+    _name = 'lms.compliance.reminder'
+    _description = 'LMS Compliance Reminder per Employee'
+    _order = 'reminder_date desc'
+    _log_access = False
+
+    rule_id = fields.Many2one(
+        'lms.compliance.rule',
+        string='Compliance Rule',
+        required=True,
+        ondelete='cascade'
+    )
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Employee',
+        required=True,
+        ondelete='cascade'
+    )
+    reminder_date = fields.Datetime(string='Reminder Date', required=True)
+    mail_id = fields.Many2one('mail.mail', string='Mail', ondelete='set null')
+
+    def init(self):
+        # Dedup lookup: last reminder of each employee for a rule
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS lms_compliance_reminder_rule_employee_idx
+                ON lms_compliance_reminder (rule_id, employee_id, reminder_date)
+        """)
+
+
+class LmsComplianceRuleReminders(models.Model):
+    _inherit = 'lms.compliance.rule'
+
+    reminder_interval_days = fields.Integer(
+        string='Days Between Reminders',
+        default=7,
+        help='An employee is not reminded again about this rule within this many days'
+    )
+
+    def _dispatch_reminders(self):
+        """Queue reminders for the rule's non-compliant employees
+
+        The non-compliant set is read once from the materialized status and
+        employees reminded within the reminder interval are skipped. The
+        template is rendered once per rule, mails are created in batches
+        and spread over time to respect the outgoing rate limit, and each
+        manager gets a single digest activity.
+
+        Returns the number of employees reminded.
+        """
+        self.ensure_one()
+        if not self._should_send_reminder():
+            return 0
+
+        self.env['lms.compliance.status'].flush_model()
+        self.env['lms.compliance.reminder'].flush_model()
+        self.env.cr.execute("""
+            SELECT s.employee_id
+              FROM lms_compliance_status s
+             WHERE s.rule_id = %s
+               AND s.state = 'non_compliant'
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM lms_compliance_reminder r
+                     WHERE r.rule_id = s.rule_id
+                       AND r.employee_id = s.employee_id
+                       AND r.reminder_date > %s
+               )
+        """, [self.id, fields.Datetime.now() - timedelta(days=self.reminder_interval_days)])
+        employees = self.env['hr.employee'].browse([row[0] for row in self.env.cr.fetchall()])
+        if not employees:
+            return 0
+
+        body = self._get_reminder_body()
+        days_left = (self.deadline_date - fields.Date.today()).days
+        subject = _('Compliance reminder: %s (%d days left)') % (self.name, days_left)
+        rate = int(self.env['ir.config_parameter'].sudo().get_param(
+            'lms_marketplace.reminder_rate_per_minute', 500
+        ))
+        now = fields.Datetime.now()
+
+        sent = 0
+        for index, batch in enumerate(split_every(REMINDER_BATCH_SIZE, employees.ids, self.env['hr.employee'].browse)):
+            # Each batch is released one rate window after the previous one
+            scheduled = now + timedelta(minutes=index * REMINDER_BATCH_SIZE / max(rate, 1))
+            recipients = batch.filtered('work_email')
+            mails = self.env['mail.mail'].sudo().create([{
+                'subject': subject,
+                'email_to': employee.work_email,
+                'body_html': Markup('<p>%s</p>') % (_('Dear %s,') % employee.name) + body,
+                'scheduled_date': scheduled,
+                'auto_delete': True,
+            } for employee in recipients])
+            mail_by_employee = dict(zip(recipients.ids, mails.ids))
+            self.env['lms.compliance.reminder'].create([{
+                'rule_id': self.id,
+                'employee_id': employee.id,
+                'reminder_date': now,
+                'mail_id': mail_by_employee.get(employee.id, False),
+            } for employee in batch])
+            sent += len(batch)
+
+        self._schedule_manager_digests(employees)
+        _logger.info("Compliance rule %s: %d reminders queued", self.code, sent)
+        return sent
+
+    def _get_reminder_body(self):
+        """Reminder body, rendered once for the whole rule"""
+        template = self.env.ref('lms_marketplace.email_template_compliance_reminder', raise_if_not_found=False)
+        if template:
+            return Markup(template._render_field('body_html', self.ids, compute_lang=True)[self.id])
+        return Markup(
+            '<p>%s</p>'
+        ) % (_('Please complete the course "%s" before %s to stay compliant with "%s".') % (
+            self.course_id.name, self.deadline_date, self.name
+        ))
+
+    def _schedule_manager_digests(self, employees):
+        """One activity per manager listing all of their reminded reports"""
+        by_manager = defaultdict(list)
+        for employee in employees:
+            if employee.parent_id.user_id:
+                by_manager[employee.parent_id.user_id].append(employee)
+
+        for user, reports in by_manager.items():
+            names = Markup('').join(Markup('<li>%s</li>') % escape(employee.name) for employee in reports)
+            self.activity_schedule(
+                'lms_marketplace.mail_activity_compliance',
+                note=Markup('<p>%s</p><ul>%s</ul>') % (
+                    _('Compliance reminders sent for %s to %d of your team members:') % (self.name, len(reports)),
+                    names,
+                ),
+                user_id=user.id,
+                date_deadline=self.deadline_date
+            )
@@ -0,0 +1,230 @@
+from odoo import models, fields, api, _
+from datetime import timedelta
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Renewal enrollments created per transaction
+RENEWAL_CHUNK_SIZE = 500
+
+
+class LmsComplianceRenewalRun(models.Model):
+    _name = 'lms.compliance.renewal.run'
+    _description = 'LMS Compliance Renewal Run'
+    _order = 'create_date desc, id desc'
+
+    rule_id = fields.Many2one(
+        'lms.compliance.rule',
+        string='Compliance Rule',
+        required=True,
+        ondelete='cascade'
+    )
+    state = fields.Selection([
+        ('running', 'Running'),
+        ('done', 'Done'),
+    ], string='Status', default='running', required=True)
+
+    # Window fixed when the run starts, so resumed chunks see the same certificates
+    window_end = fields.Datetime(string='Expiring Before', required=True)
+    # Resume point: learners are processed in partner id order
+    last_student_id = fields.Integer(string='Last Processed Learner', readonly=True)
+
+    total_count = fields.Integer(string='Learners to Renew', readonly=True)
+    created_count = fields.Integer(string='Renewals Created', readonly=True)
+    run_seconds = fields.Float(string='Run Time (s)', readonly=True)
+    started_at = fields.Datetime(string='Started', readonly=True)
+    finished_at = fields.Datetime(string='Finished', readonly=True)
+
+    progress = fields.Float(string='Progress (%)', compute='_compute_progress')
+
+    @api.depends('created_count', 'total_count')
+    def _compute_progress(self):
+        for run in self:
+            run.progress = run.total_count and run.created_count * 100.0 / run.total_count
+
+    def _get_renewal_query(self):
+        """Learners of the rule whose certificate expires inside the window
+
+        Candidates come from the partial expiry index on lms_certificate.
+        Learners with an open renewal enrollment for the rule, or already
+        holding a certificate valid beyond the window, are skipped.
+        """
+        self.ensure_one()
+        rule = self.rule_id
+        query = """
+            SELECT DISTINCT c.student_id
+              FROM lms_certificate c
+              JOIN res_users u ON u.partner_id = c.student_id
+              JOIN hr_employee e ON e.user_id = u.id
+              JOIN lms_compliance_status s ON s.employee_id = e.id AND s.rule_id = %(rule)s
+             WHERE c.is_valid
+               AND c.expiry_date IS NOT NULL
+               AND c.expiry_date > %(now)s
+               AND c.expiry_date <= %(window_end)s
+               AND c.course_id = ANY(%(courses)s::int[])
+               AND c.student_id > %(after)s
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM lms_enrollment en
+                     WHERE en.student_id = c.student_id
+                       AND en.compliance_rule_id = %(rule)s
+                       AND en.state IN ('draft', 'in_progress')
+               )
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM lms_certificate renewed
+                     WHERE renewed.student_id = c.student_id
+                       AND renewed.course_id = ANY(%(courses)s::int[])
+                       AND renewed.is_valid
+                       AND (renewed.expiry_date IS NULL OR renewed.expiry_date > %(window_end)s)
+               )
+        """
+        params = {
+            'rule': rule.id,
+            'now': fields.Datetime.now(),
+            'window_end': self.window_end,
+            'courses': rule.course_id.ids + rule.alternative_course_ids.ids,
+            'after': self.last_student_id,
+        }
+        return query, params
+
+    def _flush_renewal_sources(self):
+        for model in ('lms.certificate', 'lms.enrollment', 'lms.compliance.status', 'hr.employee', 'res.users'):
+            self.env[model].flush_model()
+
+    def _count_pending(self):
+        self.ensure_one()
+        self._flush_renewal_sources()
+        query, params = self._get_renewal_query()
+        self.env.cr.execute("SELECT COUNT(*) FROM (%s) pending" % query, params)
+        return self.env.cr.fetchone()[0]
+
+    def _run(self):
+        """Create the renewal enrollments chunk by chunk
+
+        Progress is committed with every chunk, so an interrupted run
+        resumes after the last learner it handled.
+        """
+        self.ensure_one()
+        rule = self.rule_id
+        Enrollment = self.env['lms.enrollment']
+        self._flush_renewal_sources()
+        if not self.total_count:
+            self.write({'total_count': self._count_pending(), 'started_at': fields.Datetime.now()})
+
+        while True:
+            started = time.monotonic()
+            query, params = self._get_renewal_query()
+            self.env.cr.execute(
+                "%s ORDER BY c.student_id LIMIT %%(limit)s" % query,
+                dict(params, limit=RENEWAL_CHUNK_SIZE)
+            )
+            student_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not student_ids:
+                self.write({'state': 'done', 'finished_at': fields.Datetime.now()})
+                self.env.cr.commit()
+                _logger.info(
+                    "Compliance rule %s: %d renewal enrollments created",
+                    rule.code, self.created_count
+                )
+                return
+
+            Enrollment.create([{
+                'student_id': student_id,
+                'course_id': rule.course_id.id,
+                'instructor_id': rule.course_id.instructor_id.id,
+                'compliance_rule_id': rule.id,
+                'company_id': rule.company_id.id,
+                'is_corporate_enrollment': True,
+                'payment_status': 'free',
+            } for student_id in student_ids])
+            self.write({
+                'last_student_id': student_ids[-1],
+                'created_count': self.created_count + len(student_ids),
+                'run_seconds': self.run_seconds + time.monotonic() - started,
+            })
+            # The enrollments and the resume point become visible together
+            self.env.cr.commit()
+            self.env.invalidate_all()
+
+
+class LmsComplianceRuleRenewal(models.Model):
+    _inherit = 'lms.compliance.rule'
+
+    renewal_window_days = fields.Integer(
+        string='Renewal Window (days)',
+        default=30,
+        help='Renewal enrollments are created for certificates expiring within this many days'
+    )
+    renewal_run_ids = fields.One2many('lms.compliance.renewal.run', 'rule_id', string='Renewal Runs')
+
+    @api.model
+    def _cron_generate_renewals(self):
+        """Scheduled job: resume unfinished renewal runs, then start one per due rule"""
+        runs = self.env['lms.compliance.renewal.run'].search([('state', '=', 'running')], order='id')
+        rules = self.search([
+            ('is_active', '=', True),
+            ('renewal_required', '=', True),
+            ('id', 'not in', runs.rule_id.ids),
+        ])
+        for rule in rules:
+            runs |= rule._start_renewal_run()
+        for run in runs:
+            run._run()
+
+    def _start_renewal_run(self):
+        """Start a renewal run, unless no certificate of the rule is due
+
+        Returns the new run, or an empty recordset.
+        """
+        self.ensure_one()
+        Run = self.env['lms.compliance.renewal.run']
+        now = fields.Datetime.now()
+        values = {
+            'rule_id': self.id,
+            'window_end': now + timedelta(days=self.renewal_window_days),
+        }
+        # Counted on an unsaved run, so idle days leave no empty runs behind
+        pending = Run.new(values)._count_pending()
+        if not pending:
+            return Run
+        return Run.create(dict(values, total_count=pending, started_at=now))
+
+    def action_generate_renewals(self):
+        self.ensure_one()
+        run = self.renewal_run_ids.filtered(lambda r: r.state == 'running')[:1]
+        if not run:
+            run = self._start_renewal_run()
+        if not run:
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': _('Renewals'),
+                    'message': _('No certificate is due for renewal.'),
+                    'type': 'info',
+                }
+            }
+        self.env.ref('lms_marketplace.ir_cron_lms_compliance_renewals')._trigger()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Renewals'),
+                'message': _('Renewal enrollments are being generated in the background.'),
+                'type': 'info',
+            }
+        }
+
+
+class LMSEnrollmentRenewal(models.Model):
+    _inherit = 'lms.enrollment'
+
+    def init(self):
+        # Open renewal lookup of the renewal engine
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS lms_enrollment_open_rule_student_idx
+                ON lms_enrollment (compliance_rule_id, student_id)
+             WHERE compliance_rule_id IS NOT NULL AND state IN ('draft', 'in_progress')
+        """)
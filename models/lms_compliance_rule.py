@@ -1,4 +1,4 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
 from datetime import datetime, timedelta
 
@@ -152,14 +152,10 @@ class LmsComplianceRule(models.Model):
     @api.depends('company_id', 'department_ids', 'job_position_ids')
     def _compute_compliance_stats(self):
         for rule in self:
-            affected_employees = rule._get_affected_employees()
-            rule.total_affected_employees = len(affected_employees)
-            
-            compliant_count = 0
-            for employee in affected_employees:
-                if rule._check_employee_compliance(employee.id):
-                    compliant_count += 1
+            status = rule._evaluate_compliance()
+            compliant_count = sum(1 for values in status.values() if values['compliant'])
             
+            rule.total_affected_employees = len(status)
             rule.compliant_employees = compliant_count
             rule.non_compliant_employees = rule.total_affected_employees - compliant_count
             
@@ -170,6 +166,12 @@ class LmsComplianceRule(models.Model):
     
     def _get_affected_employees(self):
         """Get employees affected by this compliance rule"""
+        employees = self.env['hr.employee'].search(self._get_affected_employee_domain())
+        return employees
+    
+    def _get_affected_employee_domain(self):
+        """Domain of the employees in the scope of this rule"""
+        self.ensure_one()
         domain = [('company_id', '=', self.company_id.id)]
         
         # Filter by department if specified
@@ -184,45 +186,89 @@ class LmsComplianceRule(models.Model):
         if self.employee_category_ids:
             domain.append(('category_ids', 'in', self.employee_category_ids.ids))
         
-        employees = self.env['hr.employee'].search(domain)
-        return employees
+        return domain
     
     def _check_employee_compliance(self, employee_id):
         """Check if an employee is compliant with this rule"""
         employee = self.env['hr.employee'].browse(employee_id)
-        partner = employee.user_id.partner_id
+        status = self._evaluate_compliance(employee)
+        return status.get(employee_id, {}).get('compliant', False)
+    
+    def _evaluate_compliance(self, employees=None):
+        """Compliance status of every affected employee, in a few queries
+
+        Returns {employee_id: values} where values holds the learner
+        partner, department and job, whether the employee is compliant,
+        the satisfying enrollment and its certificate expiry, and the end
+        of a valid exception if any. Enrollments and exceptions are
+        resolved with one query each for the whole rule instead of one
+        search per employee.
+        """
+        self.ensure_one()
+        if employees is None:
+            employees = self._get_affected_employees()
+        if not employees:
+            return {}
         
-        if not partner:
-            return False
+        self.env['hr.employee'].flush_model(['user_id', 'department_id', 'job_id'])
+        self.env['res.users'].flush_model(['partner_id'])
+        self.env['lms.enrollment'].flush_model(['student_id', 'course_id', 'state', 'score', 'certificate_id'])
+        self.env['lms.certificate'].flush_model(['expiry_date', 'is_valid'])
         
-        # Check for completed enrollment in required course or alternatives
-        required_courses = [self.course_id.id] + self.alternative_course_ids.ids
+        self.env.cr.execute("""
+            SELECT e.id, u.partner_id, e.department_id, e.job_id
+              FROM hr_employee e
+         LEFT JOIN res_users u ON u.id = e.user_id
+             WHERE e.id IN %s
+        """, [tuple(employees.ids)])
+        status = {}
+        for employee_id, partner_id, department_id, job_id in self.env.cr.fetchall():
+            status[employee_id] = {
+                'partner_id': partner_id,
+                'department_id': department_id,
+                'job_id': job_id,
+                'compliant': False,
+                'enrollment_id': False,
+                'expiry_date': False,
+                'exception_until': False,
+            }
         
-        enrollments = self.env['lms.enrollment'].search([
-            ('student_id', '=', partner.id),
-            ('course_id', 'in', required_courses),
-            ('state', '=', 'completed'),
-        ])
+        partner_ids = list({values['partner_id'] for values in status.values() if values['partner_id']})
+        satisfied = {}
+        if partner_ids:
+            # Best qualifying enrollment per learner: valid without expiry first
+            self.env.cr.execute("""
+                SELECT DISTINCT ON (en.student_id)
+                       en.student_id, en.id, c.expiry_date
+                  FROM lms_enrollment en
+             LEFT JOIN lms_certificate c ON c.id = en.certificate_id
+                 WHERE en.student_id = ANY(%(partners)s)
+                   AND en.course_id = ANY(%(courses)s)
+                   AND en.state = 'completed'
+                   AND (%(min_score)s = 0 OR en.score >= %(min_score)s)
+                   AND (NOT %(require_certificate)s OR en.certificate_id IS NOT NULL)
+                   AND (NOT %(renewal)s OR c.id IS NULL OR c.is_valid)
+              ORDER BY en.student_id, c.expiry_date DESC NULLS FIRST, en.id DESC
+            """, {
+                'partners': partner_ids,
+                'courses': [self.course_id.id] + self.alternative_course_ids.ids,
+                'min_score': self.min_score or 0,
+                'require_certificate': self.require_certificate,
+                'renewal': self.renewal_required,
+            })
+            satisfied = {
+                partner_id: (enrollment_id, expiry_date)
+                for partner_id, enrollment_id, expiry_date in self.env.cr.fetchall()
+            }
         
-        for enrollment in enrollments:
-            # Check minimum score requirement
-            if self.min_score and enrollment.score < self.min_score:
-                continue
-            
-            # Check certificate requirement
-            if self.require_certificate and not enrollment.certificate_id:
-                continue
-            
-            # Check renewal requirement
-            if self.renewal_required and enrollment.certificate_id:
-                certificate = enrollment.certificate_id
-                if certificate.expiry_date and certificate.expiry_date < fields.Date.today():
-                    continue
-            
-            # Employee is compliant
-            return True
+        exceptions = self.env['lms.compliance.exception']._get_exception_coverage(self.ids, list(status))
         
-        return False
+        for employee_id, values in status.items():
+            if values['partner_id'] in satisfied:
+                enrollment_id, expiry_date = satisfied[values['partner_id']]
+                values.update(compliant=True, enrollment_id=enrollment_id, expiry_date=expiry_date)
+            values['exception_until'] = exceptions.get((self.id, employee_id), False)
+        return status
     
     @api.constrains('min_score')
     def _check_min_score(self):
@@ -239,18 +285,7 @@ class LmsComplianceRule(models.Model):
     def action_check_compliance(self):
         """Perform compliance check for all affected employees"""
         self.ensure_one()
-        affected_employees = self._get_affected_employees()
-        
-        compliance_report = []
-        for employee in affected_employees:
-            is_compliant = self._check_employee_compliance(employee.id)
-            compliance_report.append({
-                'employee': employee.name,
-                'department': employee.department_id.name if employee.department_id else 'N/A',
-                'position': employee.job_id.name if employee.job_id else 'N/A',
-                'is_compliant': is_compliant,
-                'days_until_deadline': (self.deadline_date - fields.Date.today()).days if self.deadline_date else None,
-            })
+        self._refresh_compliance_status()
         
         self.write({
             'last_compliance_check': fields.Datetime.now(),
@@ -260,27 +295,16 @@ class LmsComplianceRule(models.Model):
         return {
             'type': 'ir.actions.act_window',
             'name': f'Compliance Report - {self.name}',
-            'res_model': 'lms.compliance.report.wizard',
-            'view_mode': 'form',
-            'target': 'new',
-            'context': {
-                'default_rule_id': self.id,
-                'default_report_data': str(compliance_report),
-            },
+            'res_model': 'lms.compliance.status',
+            'view_mode': 'tree',
+            'domain': [('rule_id', '=', self.id)],
+            'context': {'search_default_group_department': 1},
         }
     
     def action_send_reminders(self):
         """Send compliance reminders to non-compliant employees"""
         self.ensure_one()
-        affected_employees = self._get_affected_employees()
-        
-        reminder_count = 0
-        for employee in affected_employees:
-            if not self._check_employee_compliance(employee.id):
-                # Check if reminder is due
-                if self._should_send_reminder(employee.id):
-                    self._send_compliance_reminder(employee)
-                    reminder_count += 1
+        reminder_count = self._dispatch_reminders()
         
         # Log reminder activity
         self.env['lms.compliance.reminder.log'].create({
@@ -295,12 +319,12 @@ class LmsComplianceRule(models.Model):
             'tag': 'display_notification',
             'params': {
                 'title': _('Reminders Sent'),
-                'message': _('Sent %d compliance reminders') % reminder_count,
+                'message': _('Queued %d compliance reminders') % reminder_count,
                 'type': 'success',
             }
         }
     
-    def _should_send_reminder(self, employee_id):
+    def _should_send_reminder(self, employee_id=None):
         """Determine if reminder should be sent to employee"""
         if not self.deadline_date:
             return False
@@ -313,37 +337,13 @@ class LmsComplianceRule(models.Model):
         
         return False
     
-    def _send_compliance_reminder(self, employee):
-        """Send compliance reminder to employee"""
-        template = self.env.ref('lms_marketplace.email_template_compliance_reminder')
-        
-        context = {
-            'employee': employee,
-            'rule': self,
-            'days_until_deadline': (self.deadline_date - fields.Date.today()).days,
-        }
-        
-        if employee.work_email:
-            template.with_context(context).send_mail(self.id, force_send=False)
-        
-        # Create activity for employee's manager
-        if employee.parent_id and employee.parent_id.user_id:
-            self.activity_schedule(
-                'lms_marketplace.mail_activity_compliance',
-                note=_('Compliance reminder sent for %s') % self.name,
-                user_id=employee.parent_id.user_id.id,
-                date_deadline=self.deadline_date
-            )
-    
     def action_view_non_compliant(self):
         """View non-compliant employees"""
         self.ensure_one()
-        affected_employees = self._get_affected_employees()
-        
-        non_compliant_ids = []
-        for employee in affected_employees:
-            if not self._check_employee_compliance(employee.id):
-                non_compliant_ids.append(employee.id)
+        status = self._evaluate_compliance()
+        non_compliant_ids = [
+            employee_id for employee_id, values in status.items() if not values['compliant']
+        ]
         
         return {
             'type': 'ir.actions.act_window',
@@ -372,17 +372,16 @@ class LmsComplianceRule(models.Model):
         """Generate detailed compliance report"""
         self.ensure_one()
         
-        report_data = self._generate_detailed_report()
-        
         return {
             'type': 'ir.actions.act_url',
-            'url': f'/lms/compliance/report/{self.id}',
+            'url': f'/lms/compliance/report/{self.id}?file_format=xlsx',
             'target': 'new',
         }
     
     def _generate_detailed_report(self):
         """Generate detailed compliance report data"""
-        affected_employees = self._get_affected_employees()
+        status = self._evaluate_compliance()
+        affected_employees = self.env['hr.employee'].browse(list(status))
         
         report = {
             'rule_info': {
@@ -403,10 +402,9 @@ class LmsComplianceRule(models.Model):
         }
         
         for employee in affected_employees:
-            is_compliant = self._check_employee_compliance(employee.id)
-            has_exception = bool(self.exception_ids.filtered(
-                lambda e: e.employee_id == employee and e.is_valid
-            ))
+            is_compliant = status[employee.id]['compliant']
+            exception_until = status[employee.id]['exception_until']
+            has_exception = bool(exception_until)
             
             if is_compliant:
                 report['summary']['compliant'] += 1
@@ -436,15 +434,9 @@ class LmsComplianceRule(models.Model):
                 'position': employee.job_id.name if employee.job_id else 'N/A',
                 'status': 'Compliant' if is_compliant else 'Non-Compliant',
                 'has_exception': has_exception,
-                'exception_until': None,
+                'exception_until': exception_until or None,
             }
             
-            if has_exception:
-                exception = self.exception_ids.filtered(
-                    lambda e: e.employee_id == employee and e.is_valid
-                )[0]
-                employee_data['exception_until'] = exception.exception_until
-            
             report['employee_details'].append(employee_data)
         
         return report
@@ -476,16 +468,63 @@ class LmsComplianceException(models.Model):
     )
     approval_date = fields.Date(string='Approval Date', default=fields.Date.today)
     
+    # Not stored: validity depends on today's date, a stored value goes stale
     is_valid = fields.Boolean(
         string='Is Valid',
         compute='_compute_is_valid',
-        store=True
+        search='_search_is_valid'
     )
     
-    @api.depends('exception_until')
+    def init(self):
+        # Coverage lookup by rule and employee over the exception's date range
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS lms_compliance_exception_coverage_idx
+                ON lms_compliance_exception (rule_id, employee_id, exception_until, approval_date)
+        """)
+    
+    @api.depends('exception_until', 'approval_date')
     def _compute_is_valid(self):
+        today = fields.Date.today()
         for exception in self:
-            exception.is_valid = exception.exception_until >= fields.Date.today()
+            exception.is_valid = (
+                exception.exception_until >= today
+                and (not exception.approval_date or exception.approval_date <= today)
+            )
+    
+    def _search_is_valid(self, operator, value):
+        today = fields.Date.today()
+        domain = [
+            ('exception_until', '>=', today),
+            '|', ('approval_date', '=', False), ('approval_date', '<=', today),
+        ]
+        if (operator == '=') == bool(value):
+            return domain
+        return ['!', '&'] + domain
+    
+    @api.model
+    def _get_exception_coverage(self, rule_ids, employee_ids, on_date=None):
+        """End of the exception covering each (rule, employee) on a date
+
+        One indexed query for any number of rules and employees; returns
+        {(rule_id, employee_id): exception_until} for the covered pairs.
+        """
+        if not rule_ids or not employee_ids:
+            return {}
+        self.flush_model(['rule_id', 'employee_id', 'exception_until', 'approval_date'])
+        self.env.cr.execute("""
+            SELECT rule_id, employee_id, MAX(exception_until)
+              FROM lms_compliance_exception
+             WHERE rule_id = ANY(%(rules)s)
+               AND employee_id = ANY(%(employees)s)
+               AND exception_until >= %(date)s
+               AND (approval_date IS NULL OR approval_date <= %(date)s)
+          GROUP BY rule_id, employee_id
+        """, {
+            'rules': list(rule_ids),
+            'employees': list(employee_ids),
+            'date': on_date or fields.Date.today(),
+        })
+        return {(rule_id, employee_id): until for rule_id, employee_id, until in self.env.cr.fetchall()}
     
     @api.constrains('exception_until')
     def _check_exception_until(self):
@@ -0,0 +1,140 @@
+from odoo import models, fields, _
+
+# Non-compliant employees listed by a simulation
+SIMULATION_SAMPLE_SIZE = 20
+
+
+class LmsComplianceRuleSimulation(models.Model):
+    _inherit = 'lms.compliance.rule'
+
+    def _get_simulation_query(self):
+        """Scope and requirements of the rule as one SQL query
+
+        Each employee in scope is returned with whether they hold a
+        qualifying enrollment, whether a valid exception covers them, and
+        what a reminder would need (work email, manager user). The same
+        predicates as _evaluate_compliance are applied, but nothing is
+        loaded into Python.
+        """
+        self.ensure_one()
+        query = """
+            SELECT e.id,
+                   e.work_email,
+                   m.user_id AS manager_user_id,
+                   EXISTS (
+                       SELECT 1
+                         FROM lms_enrollment en
+                    LEFT JOIN lms_certificate c ON c.id = en.certificate_id
+                        WHERE en.student_id = u.partner_id
+                          AND en.course_id = ANY(%(courses)s::int[])
+                          AND en.state = 'completed'
+                          AND (%(min_score)s = 0 OR en.score >= %(min_score)s)
+                          AND (NOT %(require_certificate)s OR en.certificate_id IS NOT NULL)
+                          AND (NOT %(renewal)s OR c.id IS NULL OR c.is_valid)
+                   ) AS compliant,
+                   EXISTS (
+                       SELECT 1
+                         FROM lms_compliance_exception x
+                        WHERE x.rule_id = %(rule)s
+                          AND x.employee_id = e.id
+                          AND x.exception_until >= %(today)s
+                          AND (x.approval_date IS NULL OR x.approval_date <= %(today)s)
+                   ) AS exempt
+              FROM hr_employee e
+         LEFT JOIN res_users u ON u.id = e.user_id
+         LEFT JOIN hr_employee m ON m.id = e.parent_id
+             WHERE e.active
+               AND e.company_id = %(company)s
+               AND (%(any_department)s OR e.department_id = ANY(%(departments)s::int[]))
+               AND (%(any_job)s OR e.job_id = ANY(%(jobs)s::int[]))
+               AND (%(any_category)s OR EXISTS (
+                       SELECT 1
+                         FROM employee_category_rel r
+                        WHERE r.employee_id = e.id
+                          AND r.category_id = ANY(%(categories)s::int[])
+                   ))
+        """
+        params = {
+            'rule': self.id or 0,
+            'today': fields.Date.today(),
+            'company': self.company_id.id,
+            'courses': self.course_id.ids + self.alternative_course_ids.ids,
+            'min_score': self.min_score or 0,
+            'require_certificate': self.require_certificate,
+            'renewal': self.renewal_required,
+            'any_department': not self.department_ids,
+            'departments': self.department_ids.ids,
+            'any_job': not self.job_position_ids,
+            'jobs': self.job_position_ids.ids,
+            'any_category': not self.employee_category_ids,
+            'categories': self.employee_category_ids.ids,
+        }
+        return query, params
+
+    def _simulate_compliance(self, sample_size=SIMULATION_SAMPLE_SIZE):
+        """Dry run of the rule against current data
+
+        Returns the number of employees in scope, how many are already
+        compliant or covered by an exception, the reminder mails and
+        manager digests a dispatch would produce, and a sample of
+        non-compliant employees. Nothing is written and no mail is sent.
+        """
+        self.ensure_one()
+        for model in ('hr.employee', 'res.users', 'lms.enrollment', 'lms.certificate', 'lms.compliance.exception'):
+            self.env[model].flush_model()
+        query, params = self._get_simulation_query()
+
+        self.env.cr.execute("""
+            WITH simulated AS (%s)
+            SELECT COUNT(*),
+                   COUNT(*) FILTER (WHERE compliant),
+                   COUNT(*) FILTER (WHERE NOT compliant AND exempt),
+                   COUNT(*) FILTER (WHERE NOT compliant AND NOT exempt),
+                   COUNT(*) FILTER (WHERE NOT compliant AND NOT exempt AND work_email IS NOT NULL),
+                   COUNT(DISTINCT manager_user_id) FILTER (WHERE NOT compliant AND NOT exempt)
+              FROM simulated
+        """ % query, params)
+        total, compliant, exempt, non_compliant, mails, digests = self.env.cr.fetchone()
+
+        self.env.cr.execute("""
+            WITH simulated AS (%s)
+            SELECT id
+              FROM simulated
+             WHERE NOT compliant AND NOT exempt
+          ORDER BY id
+             LIMIT %%(limit)s
+        """ % query, dict(params, limit=sample_size))
+        sample = self.env['hr.employee'].browse([row[0] for row in self.env.cr.fetchall()])
+
+        return {
+            'total': total,
+            'compliant': compliant,
+            'exempt': exempt,
+            'non_compliant': non_compliant,
+            'compliance_rate': total and compliant * 100.0 / total,
+            'reminder_mails': mails,
+            'manager_digests': digests,
+            'sample': [{'id': employee.id, 'name': employee.name} for employee in sample],
+        }
+
+    def action_simulate_compliance(self):
+        """Show the dry run result of the rule"""
+        self.ensure_one()
+        result = self._simulate_compliance()
+        message = _(
+            '%(total)d employees in scope: %(compliant)d compliant, %(exempt)d covered by an exception, '
+            '%(non_compliant)d non-compliant (%(compliance_rate).1f%% compliance). '
+            'A reminder run would queue %(reminder_mails)d mails and %(manager_digests)d manager digests.'
+        ) % result
+        if result['sample']:
+            message += ' ' + _('Non-compliant: %s') % ', '.join(employee['name'] for employee in result['sample'])
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Simulation: %s') % self.name,
+                'message': message,
+                'sticky': True,
+                'type': 'info',
+            }
+        }
@@ -0,0 +1,172 @@
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+SNAPSHOT_PERIODS = [
+    ('daily', 'Daily'),
+    ('weekly', 'Weekly'),
+    ('monthly', 'Monthly'),
+]
+
+# A compliant employee whose certificate expires within this many days counts as expiring
+EXPIRING_WINDOW_DAYS = 30
+
+# Daily snapshots are kept this long before being folded into weekly ones,
+# weekly snapshots this long before being folded into monthly ones
+DAILY_RETENTION_DAYS = 90
+WEEKLY_RETENTION_DAYS = 365
+
+
+class LmsComplianceSnapshot(models.Model):
+    _name = 'lms.compliance.snapshot'
+    _description = 'LMS Compliance Snapshot'
+    _order = 'snapshot_date desc, rule_id'
+    _log_access = False
+
+    snapshot_date = fields.Date(string='Date', required=True)
+    period = fields.Selection(SNAPSHOT_PERIODS, string='Granularity', required=True, default='daily')
+    rule_id = fields.Many2one(
+        'lms.compliance.rule',
+        string='Compliance Rule',
+        required=True,
+        ondelete='cascade'
+    )
+    company_id = fields.Many2one('res.company', string='Company')
+    department_id = fields.Many2one('hr.department', string='Department')
+
+    total_count = fields.Integer(string='Employees')
+    compliant_count = fields.Integer(string='Compliant')
+    non_compliant_count = fields.Integer(string='Non-Compliant')
+    exempt_count = fields.Integer(string='Exception')
+    expiring_count = fields.Integer(string='Expiring')
+    # Per-row rate; grouped views weigh it by headcount, see read_group
+    compliance_rate = fields.Float(string='Compliance Rate (%)', group_operator='avg')
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS lms_compliance_snapshot_rule_date_idx
+                ON lms_compliance_snapshot (rule_id, snapshot_date)
+        """)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS lms_compliance_snapshot_period_date_idx
+                ON lms_compliance_snapshot (period, snapshot_date)
+        """)
+
+    @api.model
+    def read_group(self, domain, fields, groupby, offset=0, limit=None, orderby=False, lazy=True):
+        """Grouped compliance rate is sum(compliant) / sum(total)
+
+        Averaging the per-department rates would weigh a one-person
+        department like a thousand-person one.
+        """
+        requested = {spec.split(':')[0] for spec in fields}
+        if 'compliance_rate' not in requested:
+            return super().read_group(domain, fields, groupby, offset=offset, limit=limit,
+                                      orderby=orderby, lazy=lazy)
+        fields = list(fields) + [
+            '%s:sum' % name for name in ('compliant_count', 'total_count') if name not in requested
+        ]
+        groups = super().read_group(domain, fields, groupby, offset=offset, limit=limit,
+                                    orderby=orderby, lazy=lazy)
+        for group in groups:
+            total = group.get('total_count') or 0
+            group['compliance_rate'] = total and (group.get('compliant_count') or 0) * 100.0 / total
+        return groups
+
+    @api.model
+    def _cron_take_snapshots(self):
+        """Scheduled job: record today's counts, then apply the retention policy"""
+        self._take_snapshot()
+        self._downsample_snapshots()
+
+    @api.model
+    def _take_snapshot(self, snapshot_date=None):
+        """Aggregate the materialized compliance status per rule and department
+
+        Running it again on the same day replaces that day's rows.
+        """
+        snapshot_date = snapshot_date or fields.Date.today()
+        self.env['lms.compliance.status'].flush_model()
+        self.flush_model()
+        self.env.cr.execute("""
+            DELETE FROM lms_compliance_snapshot
+             WHERE period = 'daily' AND snapshot_date = %s
+        """, [snapshot_date])
+        self.env.cr.execute("""
+            INSERT INTO lms_compliance_snapshot (
+                snapshot_date, period, rule_id, company_id, department_id,
+                total_count, compliant_count, non_compliant_count, exempt_count,
+                expiring_count, compliance_rate
+            )
+            SELECT %(date)s, 'daily', s.rule_id, s.company_id, s.department_id,
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE s.state = 'compliant'),
+                   COUNT(*) FILTER (WHERE s.state = 'non_compliant'),
+                   COUNT(*) FILTER (WHERE s.state = 'exempt'),
+                   COUNT(*) FILTER (WHERE s.state = 'compliant' AND s.expiry_date < %(expiring)s),
+                   COUNT(*) FILTER (WHERE s.state = 'compliant') * 100.0 / COUNT(*)
+              FROM lms_compliance_status s
+              JOIN lms_compliance_rule r ON r.id = s.rule_id
+             WHERE r.is_active
+          GROUP BY s.rule_id, s.company_id, s.department_id
+        """, {
+            'date': snapshot_date,
+            'expiring': fields.Datetime.now() + timedelta(days=EXPIRING_WINDOW_DAYS),
+        })
+        _logger.info("Compliance snapshot %s: %d rows", snapshot_date, self.env.cr.rowcount)
+        self.invalidate_model()
+
+    @api.model
+    def _downsample_snapshots(self):
+        """Fold old daily rows into weekly ones and old weekly rows into monthly ones
+
+        Only whole weeks and months are folded, so a period is never split
+        between two runs. Counts of the folded rows are averaged.
+        """
+        today = fields.Date.today()
+        week_cutoff = today - timedelta(days=DAILY_RETENTION_DAYS)
+        week_cutoff -= timedelta(days=week_cutoff.weekday())
+        month_cutoff = (today - timedelta(days=WEEKLY_RETENTION_DAYS)).replace(day=1)
+
+        self.flush_model()
+        folded = self._fold_snapshots('daily', 'weekly', 'week', week_cutoff)
+        folded += self._fold_snapshots('weekly', 'monthly', 'month', month_cutoff)
+        if folded:
+            _logger.info("Compliance snapshots: %d rows downsampled", folded)
+        self.invalidate_model()
+
+    @api.model
+    def _fold_snapshots(self, source, target, unit, cutoff):
+        self.env.cr.execute("""
+            WITH folded AS (
+                DELETE FROM lms_compliance_snapshot
+                 WHERE period = %(source)s AND snapshot_date < %(cutoff)s
+             RETURNING *
+            )
+            INSERT INTO lms_compliance_snapshot (
+                snapshot_date, period, rule_id, company_id, department_id,
+                total_count, compliant_count, non_compliant_count, exempt_count,
+                expiring_count, compliance_rate
+            )
+            SELECT date_trunc(%(unit)s, snapshot_date)::date, %(target)s,
+                   rule_id, company_id, department_id,
+                   ROUND(AVG(total_count)), ROUND(AVG(compliant_count)),
+                   ROUND(AVG(non_compliant_count)), ROUND(AVG(exempt_count)),
+                   ROUND(AVG(expiring_count)),
+                   SUM(compliant_count) * 100.0 / NULLIF(SUM(total_count), 0)
+              FROM folded
+          GROUP BY date_trunc(%(unit)s, snapshot_date), rule_id, company_id, department_id
+        """, {'source': source, 'target': target, 'unit': unit, 'cutoff': cutoff})
+        return self.env.cr.rowcount
+
+
+class LmsComplianceRuleSnapshot(models.Model):
+    _inherit = 'lms.compliance.rule'
+
+    def action_view_compliance_trend(self):
+        self.ensure_one()
+        action = self.env.ref('lms_marketplace.action_lms_compliance_snapshot').read()[0]
+        action['domain'] = [('rule_id', '=', self.id)]
+        return action
@@ -0,0 +1,446 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+import csv
+import io
+import logging
+import tempfile
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+_logger = logging.getLogger(__name__)
+
+COMPLIANCE_STATES = [
+    ('compliant', 'Compliant'),
+    ('exempt', 'Exempt'),
+    ('non_compliant', 'Non-Compliant'),
+]
+
+# Status rows read per query by the streaming export
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_HEADER = [
+    'Employee', 'Department', 'Job Position', 'Status',
+    'Enrollment', 'Certificate Expiry', 'Exception Until',
+]
+
+
+class LmsComplianceStatus(models.Model):
+    _name = 'lms.compliance.status'
+    _description = 'LMS Compliance Status'
+    _order = 'rule_id, state, employee_id'
+    _log_access = False
+
+    rule_id = fields.Many2one(
+        'lms.compliance.rule',
+        string='Compliance Rule',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Employee',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    company_id = fields.Many2one('res.company', string='Company', index=True)
+    department_id = fields.Many2one('hr.department', string='Department')
+    job_id = fields.Many2one('hr.job', string='Job Position')
+
+    state = fields.Selection(COMPLIANCE_STATES, string='Status', required=True)
+    enrollment_id = fields.Many2one('lms.enrollment', string='Satisfying Enrollment', ondelete='set null')
+    expiry_date = fields.Datetime(string='Certificate Expiry')
+    exception_until = fields.Date(string='Exception Until')
+    last_update = fields.Datetime(string='Last Update')
+
+    _sql_constraints = [
+        ('rule_employee_unique', 'UNIQUE(rule_id, employee_id)',
+         'An employee has one status per compliance rule.'),
+    ]
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS lms_compliance_status_rule_state_idx
+                ON lms_compliance_status (rule_id, state)
+        """)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS lms_compliance_status_exempt_idx
+                ON lms_compliance_status (exception_until)
+             WHERE state = 'exempt'
+        """)
+
+    @api.model
+    def _cron_expire_exemptions(self):
+        """Scheduled job: exemptions whose exception ended fall back to non-compliant"""
+        self.flush_model(['state', 'exception_until'])
+        self.env.cr.execute("""
+            UPDATE lms_compliance_status
+               SET state = 'non_compliant',
+                   last_update = %s
+             WHERE state = 'exempt'
+               AND exception_until < %s
+        """, [fields.Datetime.now(), fields.Date.today()])
+        _logger.info("Compliance status: %d exemptions expired", self.env.cr.rowcount)
+        self.invalidate_model(['state', 'last_update'])
+
+
+class LmsComplianceRuleStatus(models.Model):
+    _inherit = 'lms.compliance.rule'
+
+    status_ids = fields.One2many('lms.compliance.status', 'rule_id', string='Employee Status')
+
+    @api.depends('status_ids.state')
+    def _compute_compliance_stats(self):
+        # Indexed read of the materialized status instead of a live evaluation
+        groups = self.env['lms.compliance.status'].read_group(
+            [('rule_id', 'in', self.ids)],
+            ['rule_id', 'state'],
+            ['rule_id', 'state'],
+            lazy=False
+        )
+        counts = {}
+        for group in groups:
+            counts[(group['rule_id'][0], group['state'])] = group['__count']
+        for rule in self:
+            total = sum(count for (rule_id, _state), count in counts.items() if rule_id == rule.id)
+            compliant = counts.get((rule.id, 'compliant'), 0)
+            rule.total_affected_employees = total
+            rule.compliant_employees = compliant
+            rule.non_compliant_employees = total - compliant
+            rule.compliance_rate = total and compliant * 100.0 / total
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        rules.filtered('is_active')._refresh_compliance_status()
+        return rules
+
+    def write(self, vals):
+        result = super().write(vals)
+        scope_fields = {
+            'company_id', 'department_ids', 'job_position_ids', 'employee_category_ids',
+            'course_id', 'alternative_course_ids', 'min_score', 'require_certificate',
+            'renewal_required', 'is_active',
+        }
+        if scope_fields & set(vals):
+            self.filtered('is_active')._refresh_compliance_status()
+            self.filtered(lambda rule: not rule.is_active).status_ids.unlink()
+        return result
+
+    def action_refresh_compliance_status(self):
+        self._refresh_compliance_status()
+
+    def action_view_non_compliant(self):
+        """View non-compliant employees"""
+        self.ensure_one()
+        statuses = self.env['lms.compliance.status'].search([
+            ('rule_id', '=', self.id),
+            ('state', '=', 'non_compliant'),
+        ])
+        return {
+            'type': 'ir.actions.act_window',
+            'name': f'Non-Compliant Employees - {self.name}',
+            'res_model': 'hr.employee',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', statuses.employee_id.ids)],
+            'context': {'group_by': 'department_id'},
+        }
+
+    def _refresh_compliance_status(self, employees=None):
+        """Re-evaluate and store the status rows of these rules
+
+        Without employees, the whole scope of each rule is rebuilt. With
+        employees, only their rows are touched: employees that left the
+        rule's scope lose their row, the others are upserted.
+        """
+        Status = self.env['lms.compliance.status']
+        for rule in self:
+            domain = rule._get_affected_employee_domain()
+            if employees is not None:
+                domain.append(('id', 'in', employees.ids))
+            in_scope = self.env['hr.employee'].search(domain)
+            status = rule._evaluate_compliance(in_scope)
+
+            stale_domain = [('rule_id', '=', rule.id), ('employee_id', 'not in', in_scope.ids)]
+            if employees is not None:
+                stale_domain.append(('employee_id', 'in', employees.ids))
+            Status.search(stale_domain).unlink()
+
+            if status:
+                rule._upsert_compliance_status(status)
+
+    def _upsert_compliance_status(self, status):
+        self.ensure_one()
+        today = fields.Date.today()
+        employee_ids, states, departments, jobs, enrollments, expiries, exceptions = [], [], [], [], [], [], []
+        for employee_id, values in status.items():
+            if values['compliant']:
+                state = 'compliant'
+            elif values['exception_until'] and values['exception_until'] >= today:
+                state = 'exempt'
+            else:
+                state = 'non_compliant'
+            employee_ids.append(employee_id)
+            states.append(state)
+            departments.append(values['department_id'])
+            jobs.append(values['job_id'])
+            enrollments.append(values['enrollment_id'] or None)
+            expiries.append(values['expiry_date'] or None)
+            exceptions.append(values['exception_until'] or None)
+
+        Status = self.env['lms.compliance.status']
+        Status.flush_model()
+        self.env.cr.execute("""
+            INSERT INTO lms_compliance_status (
+                rule_id, employee_id, company_id, department_id, job_id, state,
+                enrollment_id, expiry_date, exception_until, last_update
+            )
+            SELECT %(rule)s, v.employee_id, %(company)s, v.department_id, v.job_id, v.state,
+                   v.enrollment_id, v.expiry_date, v.exception_until, %(now)s
+              FROM (SELECT unnest(%(employees)s::int[]) AS employee_id,
+                           unnest(%(departments)s::int[]) AS department_id,
+                           unnest(%(jobs)s::int[]) AS job_id,
+                           unnest(%(states)s::varchar[]) AS state,
+                           unnest(%(enrollments)s::int[]) AS enrollment_id,
+                           unnest(%(expiries)s::timestamp[]) AS expiry_date,
+                           unnest(%(exceptions)s::date[]) AS exception_until) v
+            ON CONFLICT (rule_id, employee_id) DO UPDATE
+               SET company_id = EXCLUDED.company_id,
+                   department_id = EXCLUDED.department_id,
+                   job_id = EXCLUDED.job_id,
+                   state = EXCLUDED.state,
+                   enrollment_id = EXCLUDED.enrollment_id,
+                   expiry_date = EXCLUDED.expiry_date,
+                   exception_until = EXCLUDED.exception_until,
+                   last_update = EXCLUDED.last_update
+        """, {
+            'rule': self.id,
+            'company': self.company_id.id,
+            'now': fields.Datetime.now(),
+            'employees': employee_ids,
+            'departments': departments,
+            'jobs': jobs,
+            'states': states,
+            'enrollments': enrollments,
+            'expiries': expiries,
+            'exceptions': exceptions,
+        })
+        Status.invalidate_model()
+        self.invalidate_recordset(['status_ids'])
+
+    def _iter_compliance_rows(self):
+        """Yield one export row per employee status, reading in id chunks
+
+        The cache is dropped after each chunk so memory stays flat however
+        large the workforce is.
+        """
+        self.ensure_one()
+        Status = self.env['lms.compliance.status']
+        states = dict(COMPLIANCE_STATES)
+        last_id = 0
+        while True:
+            chunk = Status.search([('rule_id', '=', self.id), ('id', '>', last_id)], order='id', limit=EXPORT_CHUNK_SIZE)
+            if not chunk:
+                return
+            for status in chunk:
+                yield [
+                    status.employee_id.name,
+                    status.department_id.name or '',
+                    status.job_id.name or '',
+                    states[status.state],
+                    status.enrollment_id.display_name or '',
+                    fields.Date.to_string(status.expiry_date) if status.expiry_date else '',
+                    fields.Date.to_string(status.exception_until) if status.exception_until else '',
+                ]
+            last_id = chunk[-1].id
+            self.env.invalidate_all()
+
+    def _get_department_breakdown(self):
+        """Per-department status counts, aggregated in SQL"""
+        self.ensure_one()
+        self.env['lms.compliance.status'].flush_model()
+        self.env.cr.execute("""
+            SELECT department_id,
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE state = 'compliant'),
+                   COUNT(*) FILTER (WHERE state = 'exempt'),
+                   COUNT(*) FILTER (WHERE state = 'non_compliant')
+              FROM lms_compliance_status
+             WHERE rule_id = %s
+          GROUP BY department_id
+        """, [self.id])
+        rows = self.env.cr.fetchall()
+        departments = self.env['hr.department'].browse([row[0] for row in rows if row[0]])
+        names = {department.id: department.name for department in departments}
+        return [{
+            'department': names.get(department_id, _('No Department')),
+            'total': total,
+            'compliant': compliant,
+            'exempt': exempt,
+            'non_compliant': non_compliant,
+        } for department_id, total, compliant, exempt, non_compliant in rows]
+
+    def _export_compliance_report(self, file_format='csv'):
+        """Write the compliance report to a temporary file and return it
+
+        CSV rows are written as they are read; XLSX uses xlsxwriter in
+        constant memory mode, with the department breakdown on a second
+        sheet.
+        """
+        self.ensure_one()
+        spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        if file_format == 'csv':
+            text = io.TextIOWrapper(spool, encoding='utf-8', newline='')
+            writer = csv.writer(text)
+            writer.writerow(EXPORT_HEADER)
+            for row in self._iter_compliance_rows():
+                writer.writerow(row)
+            text.flush()
+            text.detach()
+        elif file_format == 'xlsx':
+            if xlsxwriter is None:
+                raise UserError(_("The xlsxwriter library is required for XLSX exports."))
+            workbook = xlsxwriter.Workbook(spool, {'constant_memory': True, 'in_memory': False})
+            sheet = workbook.add_worksheet(_('Employees'))
+            sheet.write_row(0, 0, EXPORT_HEADER)
+            for index, row in enumerate(self._iter_compliance_rows(), start=1):
+                sheet.write_row(index, 0, row)
+            breakdown_sheet = workbook.add_worksheet(_('Departments'))
+            breakdown_sheet.write_row(0, 0, ['Department', 'Total', 'Compliant', 'Exempt', 'Non-Compliant'])
+            for index, row in enumerate(self._get_department_breakdown(), start=1):
+                breakdown_sheet.write_row(index, 0, [
+                    row['department'], row['total'], row['compliant'], row['exempt'], row['non_compliant'],
+                ])
+            workbook.close()
+        else:
+            raise UserError(_("Unsupported export format: %s") % file_format)
+        spool.seek(0)
+        return spool
+
+    @api.model
+    def _refresh_status_for_partners(self, partners, courses=None):
+        """Refresh the rows of the employees behind these learner partners
+
+        Called from enrollment, certificate and employee hooks by users who
+        may not read compliance data; the status is derived data, so the
+        refresh runs as superuser.
+        """
+        if not partners:
+            return
+        self = self.sudo()
+        employees = self.env['hr.employee'].search([('user_id.partner_id', 'in', partners.ids)])
+        if not employees:
+            return
+        domain = [('is_active', '=', True), ('company_id', 'in', employees.company_id.ids)]
+        if courses is not None:
+            domain += ['|', ('course_id', 'in', courses.ids), ('alternative_course_ids', 'in', courses.ids)]
+        self.search(domain)._refresh_compliance_status(employees)
+
+
+class LmsComplianceExceptionStatus(models.Model):
+    _inherit = 'lms.compliance.exception'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        exceptions = super().create(vals_list)
+        exceptions._refresh_rule_status()
+        return exceptions
+
+    def write(self, vals):
+        previous = self.mapped(lambda e: (e.rule_id, e.employee_id))
+        result = super().write(vals)
+        if {'rule_id', 'employee_id', 'exception_until', 'approval_date'} & set(vals):
+            for rule, employee in previous:
+                rule._refresh_compliance_status(employee)
+            self._refresh_rule_status()
+        return result
+
+    def unlink(self):
+        previous = self.mapped(lambda e: (e.rule_id, e.employee_id))
+        result = super().unlink()
+        for rule, employee in previous:
+            if rule.exists() and rule.is_active:
+                rule._refresh_compliance_status(employee)
+        return result
+
+    def _refresh_rule_status(self):
+        for rule in self.rule_id.filtered('is_active'):
+            rule._refresh_compliance_status(self.filtered(lambda e: e.rule_id == rule).employee_id)
+
+
+class LMSEnrollmentComplianceStatus(models.Model):
+    _inherit = 'lms.enrollment'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        enrollments = super().create(vals_list)
+        completed = enrollments.filtered(lambda e: e.state == 'completed')
+        if completed:
+            self.env['lms.compliance.rule']._refresh_status_for_partners(completed.student_id, completed.course_id)
+        return enrollments
+
+    def write(self, vals):
+        # The learner and course the enrollment counted for before the change
+        previous_students = self.student_id if {'student_id', 'course_id'} & set(vals) else None
+        previous_courses = self.course_id if previous_students is not None else None
+        result = super().write(vals)
+        Rule = self.env['lms.compliance.rule']
+        if previous_students is not None:
+            Rule._refresh_status_for_partners(previous_students, previous_courses)
+        if {'state', 'score', 'certificate_id', 'student_id', 'course_id'} & set(vals):
+            Rule._refresh_status_for_partners(self.student_id, self.course_id)
+        return result
+
+
+class LMSCertificateComplianceStatus(models.Model):
+    _inherit = 'lms.certificate'
+
+    def write(self, vals):
+        result = super().write(vals)
+        if {'expiry_date', 'revoked', 'is_valid'} & set(vals):
+            self._refresh_compliance_status()
+        return result
+
+    @api.model
+    def _expire_certificates(self):
+        expired = super()._expire_certificates()
+        expired._refresh_compliance_status()
+        return expired
+
+    def _refresh_compliance_status(self):
+        enrollments = self.env['lms.enrollment'].sudo().search([('certificate_id', 'in', self.ids)])
+        self.env['lms.compliance.rule']._refresh_status_for_partners(enrollments.student_id, enrollments.course_id)
+
+
+class HrEmployeeComplianceStatus(models.Model):
+    _inherit = 'hr.employee'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        employees = super().create(vals_list)
+        employees._refresh_compliance_status()
+        return employees
+
+    def write(self, vals):
+        result = super().write(vals)
+        if {'active', 'department_id', 'job_id', 'category_ids', 'company_id', 'user_id'} & set(vals):
+            self._refresh_compliance_status()
+        return result
+
+    def _refresh_compliance_status(self):
+        # Derived data: refreshed whatever the rights of the HR user
+        employees = self.sudo()
+        rules = self.env['lms.compliance.rule'].sudo().search([
+            ('is_active', '=', True),
+            ('company_id', 'in', employees.company_id.ids),
+        ])
+        # Rows in other companies' rules, or of archived employees, are
+        # dropped by the scope check
+        rules |= self.env['lms.compliance.status'].sudo().search([
+            ('employee_id', 'in', self.ids),
+        ]).rule_id.filtered('is_active')
+        rules._refresh_compliance_status(employees)
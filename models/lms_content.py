@@ -330,11 +330,12 @@ class LMSContentProgress(models.Model):
     last_position = fields.Float(string='Last Position (seconds)', help='Last playback position for video/audio content')
     total_views = fields.Integer(string='Total Views', default=0)
     
-    @api.model
-    def create(self, vals):
-        if 'state' in vals and vals['state'] == 'in_progress' and not vals.get('start_date'):
-            vals['start_date'] = fields.Datetime.now()
-        return super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if 'state' in vals and vals['state'] == 'in_progress' and not vals.get('start_date'):
+                vals['start_date'] = fields.Datetime.now()
+        return super().create(vals_list)
     
     def write(self, vals):
         if 'state' in vals:
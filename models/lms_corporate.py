@@ -1,4 +1,4 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
 class LMSCorporate(models.Model):
@@ -31,46 +31,30 @@ class LMSCorporate(models.Model):
     
     @api.model
     def bulk_enroll_employees(self, company_id, course_ids, employee_ids=None):
-        """Bulk enroll employees in courses"""
-        company = self.env['res.company'].browse(company_id)
-        
-        if not employee_ids:
-            # Get all employees of the company
-            employees = self.env['hr.employee'].search([
-                ('company_id', '=', company_id)
-            ])
-            employee_ids = employees.mapped('user_id.partner_id').ids
-        else:
-            employees = self.env['hr.employee'].browse(employee_ids)
-            employee_ids = employees.mapped('user_id.partner_id').ids
-        
-        courses = self.env['lms.course'].browse(course_ids)
-        
-        enrollments = []
-        for course in courses:
-            for employee_id in employee_ids:
-                # Check if already enrolled
-                existing = self.env['lms.enrollment'].search([
-                    ('course_id', '=', course.id),
-                    ('student_id', '=', employee_id)
-                ])
-                
-                if not existing:
-                    enrollment = self.env['lms.enrollment'].create({
-                        'student_id': employee_id,
-                        'course_id': course.id,
-                        'company_id': company_id,
-                        'is_corporate_enrollment': True,
-                        'payment_status': 'free',  # Corporate accounts typically have pre-paid access
-                        'state': 'in_progress',
-                    })
-                    enrollments.append(enrollment.id)
-        
-        return enrollments
+        """Bulk enroll employees in courses
+
+        Enrollments are created in the background by a resumable job that
+        only inserts the missing (course, learner) pairs; the job is
+        returned so callers can follow its progress.
+        """
+        if not course_ids:
+            raise UserError(_("Select at least one course to enroll employees in."))
+        job = self.env['lms.corporate.enrollment.job'].create({
+            'company_id': company_id,
+            'course_ids': [(6, 0, course_ids)],
+            'employee_ids': [(6, 0, employee_ids or [])],
+        })
+        job.action_start()
+        return job
     
     @api.model
     def generate_training_report(self, company_id, date_from=None, date_to=None):
-        """Generate comprehensive training report for corporation"""
+        """Generate comprehensive training report for corporation
+
+        Figures come from grouped SQL aggregates over the enrollments
+        (overall, per course, per learner); department figures are folded
+        from the per-learner counts through the employee -> learner map.
+        """
         company = self.env['res.company'].browse(company_id)
         
         # Get all corporate enrollments
@@ -80,19 +64,76 @@ class LMSCorporate(models.Model):
         if date_to:
             domain.append(('enrollment_date', '<=', date_to))
         
-        enrollments = self.env['lms.enrollment'].search(domain)
-        employees = self.env['hr.employee'].search([('company_id', '=', company_id)])
+        Enrollment = self.env['lms.enrollment']
+        # search() used to enforce the model ACL; _apply_ir_rules only applies record rules
+        Enrollment.check_access_rights('read')
+        Enrollment.flush_model(['company_id', 'enrollment_date', 'student_id', 'course_id', 'state', 'score'])
+        query = Enrollment._where_calc(domain)
+        Enrollment._apply_ir_rules(query, 'read')
+        from_clause, where_clause, where_params = query.get_sql()
+        where_clause = where_clause or 'TRUE'
+        
+        self.env.cr.execute(f"""
+            SELECT COUNT(*),
+                   COUNT(DISTINCT "lms_enrollment".student_id),
+                   COUNT(*) FILTER (WHERE "lms_enrollment".state = 'completed'),
+                   COUNT(*) FILTER (WHERE "lms_enrollment".state = 'in_progress'),
+                   COUNT(*) FILTER (WHERE "lms_enrollment".state = 'draft')
+              FROM {from_clause}
+             WHERE {where_clause}
+        """, where_params)
+        total, enrolled, completed, in_progress, draft = self.env.cr.fetchone()
+        
+        # Latest enrollment first, as the courses appear in the enrollment order
+        self.env.cr.execute(f"""
+            SELECT "lms_enrollment".course_id,
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE "lms_enrollment".state = 'completed'),
+                   COALESCE(SUM(COALESCE("lms_enrollment".score, 0))
+                            FILTER (WHERE "lms_enrollment".state = 'completed'), 0)
+              FROM {from_clause}
+             WHERE {where_clause}
+          GROUP BY "lms_enrollment".course_id
+          ORDER BY MAX("lms_enrollment".enrollment_date) DESC NULLS LAST, MAX("lms_enrollment".id) DESC
+        """, where_params)
+        course_rows = self.env.cr.fetchall()
+        
+        self.env.cr.execute(f"""
+            SELECT "lms_enrollment".student_id,
+                   COUNT(*) FILTER (WHERE "lms_enrollment".state = 'completed')
+              FROM {from_clause}
+             WHERE {where_clause}
+          GROUP BY "lms_enrollment".student_id
+        """, where_params)
+        completed_by_learner = dict(self.env.cr.fetchall())
+        
+        employees = self.env['hr.employee'].search_read(
+            [('company_id', '=', company_id)], ['department_id', 'user_id']
+        )
+        learner_by_user = {
+            user['id']: user['partner_id'][0]
+            for user in self.env['res.users'].with_context(active_test=False).search_read(
+                [('id', 'in', list({e['user_id'][0] for e in employees if e['user_id']}))],
+                ['partner_id'],
+            )
+        }
+        department_names = {
+            department.id: department.name
+            for department in self.env['hr.department'].browse(
+                list({e['department_id'][0] for e in employees if e['department_id']})
+            )
+        }
         
         report_data = {
             'company_name': company.name,
             'report_period': f"{date_from} to {date_to}" if date_from and date_to else "All Time",
             'total_employees': len(employees),
-            'enrolled_employees': len(set(enrollments.mapped('student_id'))),
-            'total_enrollments': len(enrollments),
+            'enrolled_employees': enrolled,
+            'total_enrollments': total,
             'completion_statistics': {
-                'completed': len(enrollments.filtered(lambda e: e.state == 'completed')),
-                'in_progress': len(enrollments.filtered(lambda e: e.state == 'in_progress')),
-                'not_started': len(enrollments.filtered(lambda e: e.state == 'draft')),
+                'completed': completed,
+                'in_progress': in_progress,
+                'not_started': draft,
             },
             'course_performance': {},
             'department_breakdown': {},
@@ -100,20 +141,21 @@ class LMSCorporate(models.Model):
         }
         
         # Course performance
-        for course in enrollments.mapped('course_id'):
-            course_enrollments = enrollments.filtered(lambda e: e.course_id == course)
-            completed = course_enrollments.filtered(lambda e: e.state == 'completed')
-            
-            report_data['course_performance'][course.name] = {
-                'total_enrollments': len(course_enrollments),
-                'completed': len(completed),
-                'completion_rate': (len(completed) / len(course_enrollments)) * 100 if course_enrollments else 0,
-                'average_score': sum(completed.mapped('score')) / len(completed) if completed else 0,
+        course_names = {
+            course.id: course.name
+            for course in self.env['lms.course'].browse([row[0] for row in course_rows])
+        }
+        for course_id, course_total, course_completed, score_sum in course_rows:
+            report_data['course_performance'][course_names[course_id]] = {
+                'total_enrollments': course_total,
+                'completed': course_completed,
+                'completion_rate': (course_completed / course_total) * 100 if course_total else 0,
+                'average_score': score_sum / course_completed if course_completed else 0,
             }
         
         # Department breakdown
         for employee in employees:
-            dept = employee.department_id.name if employee.department_id else 'No Department'
+            dept = department_names[employee['department_id'][0]] if employee['department_id'] else 'No Department'
             if dept not in report_data['department_breakdown']:
                 report_data['department_breakdown'][dept] = {
                     'total_employees': 0,
@@ -123,14 +165,10 @@ class LMSCorporate(models.Model):
             
             report_data['department_breakdown'][dept]['total_employees'] += 1
             
-            employee_enrollments = enrollments.filtered(
-                lambda e: e.student_id == employee.user_id.partner_id
-            )
-            if employee_enrollments:
+            learner_id = employee['user_id'] and learner_by_user.get(employee['user_id'][0])
+            if learner_id in completed_by_learner:
                 report_data['department_breakdown'][dept]['enrolled_employees'] += 1
-                report_data['department_breakdown'][dept]['completed_courses'] += len(
-                    employee_enrollments.filtered(lambda e: e.state == 'completed')
-                )
+                report_data['department_breakdown'][dept]['completed_courses'] += completed_by_learner[learner_id]
         
         return report_data
     
@@ -217,25 +255,16 @@ class LMSComplianceTracking(models.Model):
     
     @api.model
     def send_compliance_reminders(self, company_id, compliance_rule_id):
-        """Send reminders for compliance deadlines"""
-        compliance_report = self.track_compliance(company_id, compliance_rule_id)
-        
-        for employee_status in compliance_report['employees']:
-            if not employee_status['is_compliant']:
-                days_until_deadline = employee_status['days_until_deadline']
-                
-                if days_until_deadline and days_until_deadline <= 30:
-                    # Send reminder email
-                    self._send_reminder_email(employee_status, compliance_report)
-        
-        return len([e for e in compliance_report['employees'] if not e['is_compliant']])
-    
-    def _send_reminder_email(self, employee_status, compliance_report):
-        """Send compliance reminder email"""
-        # Implementation for sending email reminders
-        template = self.env.ref('lms_marketplace.compliance_reminder_email')
-        
-        template.with_context({
-            'employee': employee_status,
-            'compliance_rule': compliance_report,
-        }).send_mail(self.id, force_send=True)
\ No newline at end of file
+        """Send reminders for compliance deadlines
+
+        Goes through the reminder pipeline of the rule, so reminders are
+        batched, rate limited and not repeated within the rule's interval.
+        Returns the number of employees reminded.
+        """
+        compliance_rule = self.env['lms.compliance.rule'].search([
+            ('id', '=', compliance_rule_id),
+            ('company_id', '=', company_id),
+        ])
+        if not compliance_rule:
+            return 0
+        return compliance_rule._dispatch_reminders()
@@ -0,0 +1,193 @@
+from odoo import models, fields, api, _
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+# (course, learner) pairs enrolled per transaction by a bulk enrollment job
+BULK_ENROLL_CHUNK_SIZE = 1000
+
+
+class LMSCorporateEnrollmentJob(models.Model):
+    _name = 'lms.corporate.enrollment.job'
+    _description = 'LMS Corporate Bulk Enrollment Job'
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char(string='Description', required=True,
+                       default=lambda self: _('Bulk enrollment'))
+    company_id = fields.Many2one('res.company', string='Company', required=True,
+                                 default=lambda self: self.env.company)
+    course_ids = fields.Many2many('lms.course', string='Courses', required=True)
+    employee_ids = fields.Many2many(
+        'hr.employee',
+        string='Employees',
+        help='Leave empty to enroll every active employee of the company'
+    )
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('cancelled', 'Cancelled'),
+    ], string='Status', default='draft', required=True)
+
+    # Resume point: pairs are processed in (course id, learner id) order
+    last_course_id = fields.Integer(string='Last Processed Course', readonly=True)
+    last_student_id = fields.Integer(string='Last Processed Learner', readonly=True)
+
+    total_count = fields.Integer(string='Missing Enrollments', readonly=True)
+    processed_count = fields.Integer(string='Processed', readonly=True)
+    created_count = fields.Integer(string='Enrolled', readonly=True)
+    full_count = fields.Integer(string='Skipped (Course Full)', readonly=True)
+    run_seconds = fields.Float(string='Run Time (s)', readonly=True)
+    started_at = fields.Datetime(string='Started', readonly=True)
+    finished_at = fields.Datetime(string='Finished', readonly=True)
+
+    progress = fields.Float(string='Progress (%)', compute='_compute_progress')
+
+    @api.depends('processed_count', 'total_count')
+    def _compute_progress(self):
+        for job in self:
+            job.progress = job.total_count and job.processed_count * 100.0 / job.total_count
+
+    def _get_missing_pairs_query(self):
+        """(course, learner) pairs without any enrollment, as one anti-join"""
+        self.ensure_one()
+        query = """
+            WITH learners AS (
+                SELECT DISTINCT u.partner_id
+                  FROM hr_employee e
+                  JOIN res_users u ON u.id = e.user_id
+                 WHERE CASE WHEN %(all_employees)s
+                            THEN e.active AND e.company_id = %(company)s
+                            -- Explicitly selected employees are enrolled as given
+                            ELSE e.id = ANY(%(employees)s::int[])
+                       END
+            )
+            SELECT c.id, l.partner_id
+              FROM lms_course c
+        CROSS JOIN learners l
+             WHERE c.id = ANY(%(courses)s::int[])
+               AND (c.id, l.partner_id) > (%(last_course)s, %(last_student)s)
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM lms_enrollment en
+                     WHERE en.course_id = c.id
+                       AND en.student_id = l.partner_id
+               )
+        """
+        params = {
+            'company': self.company_id.id,
+            'all_employees': not self.employee_ids,
+            'employees': self.employee_ids.ids,
+            'courses': self.course_ids.ids,
+            'last_course': self.last_course_id,
+            'last_student': self.last_student_id,
+        }
+        return query, params
+
+    def action_start(self):
+        for job in self.filtered(lambda j: j.state in ('draft', 'cancelled')):
+            values = {'state': 'running', 'started_at': job.started_at or fields.Datetime.now()}
+            if job.state == 'draft':
+                values['total_count'] = job._count_missing_pairs()
+            job.write(values)
+        self.env.ref('lms_marketplace.ir_cron_lms_corporate_enrollment')._trigger()
+
+    def action_cancel(self):
+        self.filtered(lambda j: j.state == 'running').write({'state': 'cancelled'})
+
+    def _count_missing_pairs(self):
+        self.ensure_one()
+        self.env['lms.enrollment'].flush_model(['course_id', 'student_id'])
+        query, params = self._get_missing_pairs_query()
+        self.env.cr.execute("SELECT COUNT(*) FROM (%s) missing" % query, params)
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _cron_run_enrollment_jobs(self):
+        """Scheduled job: advance running bulk enrollment jobs chunk by chunk
+
+        Progress is committed with every chunk, so an interrupted job picks
+        up after the last pair it handled.
+        """
+        for job in self.search([('state', '=', 'running')], order='id'):
+            job._run()
+
+    def _run(self):
+        self.ensure_one()
+        Enrollment = self.env['lms.enrollment']
+        while True:
+            self.env.cr.execute(
+                "SELECT state FROM lms_corporate_enrollment_job WHERE id = %s FOR UPDATE",
+                [self.id]
+            )
+            if self.env.cr.fetchone()[0] != 'running':
+                # Cancelled in the meantime
+                self.env.cr.commit()
+                return
+
+            started = time.monotonic()
+            Enrollment.flush_model(['course_id', 'student_id', 'state'])
+            query, params = self._get_missing_pairs_query()
+            self.env.cr.execute(
+                "%s ORDER BY c.id, l.partner_id LIMIT %%(limit)s" % query,
+                dict(params, limit=BULK_ENROLL_CHUNK_SIZE)
+            )
+            pairs = self.env.cr.fetchall()
+            if not pairs:
+                self.write({'state': 'done', 'finished_at': fields.Datetime.now()})
+                self.env.cr.commit()
+                _logger.info(
+                    "Bulk enrollment %s done: %d enrolled, %d skipped on full courses",
+                    self.id, self.created_count, self.full_count
+                )
+                return
+
+            # Seats are counted once per chunk, not per enrollment
+            courses = self.env['lms.course'].browse(list({course_id for course_id, _student_id in pairs}))
+            seats = courses._get_available_seats()
+            vals_list = []
+            for course_id, student_id in pairs:
+                if seats[course_id] is not None:
+                    if seats[course_id] <= 0:
+                        continue
+                    seats[course_id] -= 1
+                vals_list.append({
+                    'student_id': student_id,
+                    'course_id': course_id,
+                    'instructor_id': courses.browse(course_id).instructor_id.id,
+                    'company_id': self.company_id.id,
+                    'is_corporate_enrollment': True,
+                    'payment_status': 'free',  # Corporate accounts typically have pre-paid access
+                    'state': 'in_progress',
+                })
+            Enrollment.create(vals_list)
+            self.write({
+                'last_course_id': pairs[-1][0],
+                'last_student_id': pairs[-1][1],
+                'processed_count': self.processed_count + len(pairs),
+                'created_count': self.created_count + len(vals_list),
+                'full_count': self.full_count + len(pairs) - len(vals_list),
+                'run_seconds': self.run_seconds + time.monotonic() - started,
+            })
+            # The enrollments and the resume point become visible together
+            self.env.cr.commit()
+            self.env.invalidate_all()
+
+
+class LMSCourseSeats(models.Model):
+    _inherit = 'lms.course'
+
+    def _get_available_seats(self):
+        """Remaining seats per course id, None when the course is unlimited"""
+        groups = self.env['lms.enrollment'].read_group(
+            [('course_id', 'in', self.ids), ('state', '=', 'in_progress')],
+            ['course_id'],
+            ['course_id']
+        )
+        taken = {group['course_id'][0]: group['course_id_count'] for group in groups}
+        return {
+            course.id: course.max_students - taken.get(course.id, 0) if course.max_students else None
+            for course in self
+        }
+
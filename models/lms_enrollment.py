@@ -110,12 +110,16 @@ class LMSEnrollment(models.Model):
         if self.progress < 100:
             raise UserError(_("Cannot complete course with progress less than 100%"))
         
+        template = self.course_id.certificate_template or self.env['lms.certificate.template']._get_default_template()
         certificate = self.env['lms.certificate'].create({
             'student_id': self.student_id.id,
             'course_id': self.course_id.id,
             'enrollment_id': self.id,
             'issue_date': fields.Datetime.now(),
+            'template_id': template.id,
         })
+        # Rendered by the certificate job, not in this request
+        self.env.ref('lms_marketplace.ir_cron_lms_render_certificates')._trigger()
         
         self.write({
             'state': 'completed',
@@ -163,11 +167,12 @@ class LMSContentProgress(models.Model):
     quiz_attempt_id = fields.Many2one('lms.quiz.attempt', string='Quiz Attempt')
     score = fields.Float(string='Score', related='quiz_attempt_id.score')
     
-    @api.model
-    def create(self, vals):
-        if 'state' in vals and vals['state'] == 'in_progress' and not vals.get('start_date'):
-            vals['start_date'] = fields.Datetime.now()
-        return super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if 'state' in vals and vals['state'] == 'in_progress' and not vals.get('start_date'):
+                vals['start_date'] = fields.Datetime.now()
+        return super().create(vals_list)
     
     def write(self, vals):
         if 'state' in vals and vals['state'] == 'completed':
@@ -0,0 +1,305 @@
+from odoo import models, fields, api, _
+from collections import defaultdict
+import hashlib
+import logging
+import random
+import re
+import struct
+
+_logger = logging.getLogger(__name__)
+
+# MinHash parameters. With 16 bands of 8 rows, pairs above ~0.7 Jaccard
+# similarity collide in at least one band with high probability, while
+# unrelated essays almost never share a bucket.
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 3
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# Fixed seed: signatures must stay comparable across runs and workers
+_rng = random.Random(20240917)
+PERMUTATIONS = [
+    (_rng.randint(1, MERSENNE_PRIME - 1), _rng.randint(0, MERSENNE_PRIME - 1))
+    for _i in range(NUM_PERMUTATIONS)
+]
+
+ESSAY_CHUNK_SIZE = 500
+
+
+def _shingles(text):
+    """Hashed word k-shingles of a normalized essay"""
+    words = re.findall(r'\w+', (text or '').lower())
+    if not words:
+        return set()
+    if len(words) < SHINGLE_SIZE:
+        grams = [' '.join(words)]
+    else:
+        grams = (' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1))
+    return {
+        struct.unpack('<I', hashlib.blake2b(gram.encode(), digest_size=4).digest())[0]
+        for gram in grams
+    }
+
+
+def _minhash(shingles):
+    return [
+        min(((a * value + b) % MERSENNE_PRIME) & MAX_HASH for value in shingles)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def _band_keys(signature):
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(struct.pack('<%dI' % LSH_ROWS, *rows), digest_size=8).hexdigest()
+        keys.append('%d:%s' % (band, digest))
+    return keys
+
+
+def _decode_signature(value):
+    return list(struct.unpack('<%dI' % NUM_PERMUTATIONS, bytes.fromhex(value)))
+
+
+def _estimate_similarity(signature_a, signature_b):
+    same = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+    return same / NUM_PERMUTATIONS
+
+
+class LMSEssaySignature(models.Model):
+    _name = 'lms.essay.signature'
+    _description = 'LMS Essay MinHash Signature'
+
+    attempt_question_id = fields.Many2one(
+        'lms.quiz.attempt.question',
+        string='Essay Response',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    question_id = fields.Many2one('lms.question', string='Question', index=True)
+    quiz_id = fields.Many2one('lms.quiz', string='Quiz')
+    student_id = fields.Many2one('res.partner', string='Student')
+    signature = fields.Char(string='MinHash Signature')
+    shingle_count = fields.Integer(string='Shingles')
+
+    _sql_constraints = [
+        ('attempt_question_unique', 'UNIQUE(attempt_question_id)',
+         'An essay response has a single signature.'),
+    ]
+
+
+class LMSEssayBucket(models.Model):
+    _name = 'lms.essay.bucket'
+    _description = 'LMS Essay LSH Bucket'
+    _log_access = False
+
+    signature_id = fields.Many2one(
+        'lms.essay.signature',
+        string='Signature',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    question_id = fields.Many2one('lms.question', string='Question')
+    bucket_key = fields.Char(string='Bucket', required=True, index=True)
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS lms_essay_bucket_question_key_idx
+                ON lms_essay_bucket (question_id, bucket_key)
+        """)
+
+
+class LMSEssayMatch(models.Model):
+    _name = 'lms.essay.match'
+    _description = 'LMS Near-Duplicate Essay Match'
+    _order = 'similarity desc, id desc'
+
+    response_id = fields.Many2one(
+        'lms.quiz.attempt.question',
+        string='Response',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    matched_response_id = fields.Many2one(
+        'lms.quiz.attempt.question',
+        string='Matched Response',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    question_id = fields.Many2one('lms.question', string='Question')
+    student_id = fields.Many2one('res.partner', string='Student')
+    matched_student_id = fields.Many2one('res.partner', string='Matched Student')
+    similarity = fields.Float(string='Estimated Similarity (%)')
+    state = fields.Selection([
+        ('new', 'To Review'),
+        ('confirmed', 'Confirmed'),
+        ('dismissed', 'Dismissed'),
+    ], string='Status', default='new')
+
+    def action_confirm(self):
+        self.write({'state': 'confirmed'})
+
+    def action_dismiss(self):
+        self.write({'state': 'dismissed'})
+
+
+class LMSQuizEssaySimilarity(models.Model):
+    _inherit = 'lms.quiz'
+
+    similarity_scope = fields.Selection([
+        ('question', 'Same Question'),
+        ('global', 'All Essays'),
+    ], string='Duplicate Detection Scope', default='question',
+        help='Compare essays only with answers to the same question (across all '
+             'attempts and cohorts), or with every indexed essay')
+
+
+class LMSAttemptQuestionSimilarity(models.Model):
+    _inherit = 'lms.quiz.attempt.question'
+
+    max_similarity = fields.Float(
+        string='Max Similarity (%)',
+        readonly=True,
+        help='Highest estimated similarity with another student\'s essay'
+    )
+    essay_match_ids = fields.One2many(
+        'lms.essay.match',
+        'response_id',
+        string='Similar Essays'
+    )
+
+    @api.model
+    def _cron_index_essays(self):
+        """Scheduled job: sign new essays and look up near-duplicates"""
+        threshold = float(self.env['ir.config_parameter'].sudo().get_param(
+            'lms_marketplace.essay_similarity_threshold', 0.8
+        ))
+        last_id = 0
+        while True:
+            self.env['lms.essay.signature'].flush_model()
+            self.flush_model(['student_essay_answer', 'attempt_id'])
+            self.env.cr.execute("""
+                SELECT aq.id
+                  FROM lms_quiz_attempt_question aq
+                  JOIN lms_quiz_attempt a ON a.id = aq.attempt_id
+             LEFT JOIN lms_essay_signature s ON s.attempt_question_id = aq.id
+                 WHERE a.state IN ('submitted', 'graded')
+                   AND COALESCE(aq.student_essay_answer, '') != ''
+                   AND s.id IS NULL
+                   AND aq.id > %s
+              ORDER BY aq.id
+                 LIMIT %s
+            """, [last_id, ESSAY_CHUNK_SIZE])
+            responses = self.browse([row[0] for row in self.env.cr.fetchall()])
+            if not responses:
+                break
+            last_id = responses[-1].id
+            responses._index_essays(threshold)
+            self.env.cr.commit()
+            self.env.invalidate_all()
+
+    def _index_essays(self, threshold):
+        """Sign a batch of essays, store their LSH buckets and record matches
+
+        Candidates come from an indexed lookup of the batch's bucket keys,
+        so each essay is only compared with the few essays sharing a band.
+        """
+        Signature = self.env['lms.essay.signature']
+        signature_vals = []
+        band_keys = {}
+        for response in self:
+            vals = {
+                'attempt_question_id': response.id,
+                'question_id': response.question_id.id,
+                'quiz_id': response.attempt_id.quiz_id.id,
+                'student_id': response.attempt_id.student_id.id,
+                'shingle_count': 0,
+            }
+            shingles = _shingles(response.student_essay_answer)
+            if shingles:
+                signature = _minhash(shingles)
+                vals.update(
+                    signature=struct.pack('<%dI' % NUM_PERMUTATIONS, *signature).hex(),
+                    shingle_count=len(shingles),
+                )
+                band_keys[response.id] = _band_keys(signature)
+            # Without words there is nothing to compare: the signature-less
+            # row only marks the essay as indexed and gets no bucket
+            signature_vals.append(vals)
+        if not signature_vals:
+            return
+
+        signatures = Signature.create(signature_vals)
+        self.env['lms.essay.bucket'].create([
+            {
+                'signature_id': signature.id,
+                'question_id': signature.question_id.id,
+                'bucket_key': key,
+            }
+            for signature in signatures
+            for key in band_keys.get(signature.attempt_question_id.id, ())
+        ])
+        self.env['lms.essay.bucket'].flush_model()
+
+        # Candidate pairs: signatures sharing at least one bucket
+        self.env.cr.execute("""
+            SELECT DISTINCT mine.signature_id, other.signature_id
+              FROM lms_essay_bucket mine
+              JOIN lms_essay_bucket other
+                ON other.bucket_key = mine.bucket_key
+               AND other.signature_id != mine.signature_id
+              JOIN lms_essay_signature s ON s.id = mine.signature_id
+              JOIN lms_quiz q ON q.id = s.quiz_id
+             WHERE mine.signature_id IN %s
+               AND (q.similarity_scope = 'global' OR other.question_id = mine.question_id)
+        """, [tuple(signatures.ids)])
+        pairs = self.env.cr.fetchall()
+        if not pairs:
+            return
+
+        candidates = Signature.browse({signature_id for pair in pairs for signature_id in pair})
+        decoded = {signature.id: _decode_signature(signature.signature) for signature in candidates}
+
+        match_vals = []
+        best = defaultdict(float)
+        seen = set()
+        for signature_id, other_id in pairs:
+            pair_key = tuple(sorted((signature_id, other_id)))
+            if pair_key in seen:
+                continue
+            seen.add(pair_key)
+
+            signature = Signature.browse(signature_id)
+            other = Signature.browse(other_id)
+            if signature.student_id == other.student_id:
+                continue
+            similarity = _estimate_similarity(decoded[signature_id], decoded[other_id])
+            if similarity < threshold:
+                continue
+
+            for mine, theirs in ((signature, other), (other, signature)):
+                match_vals.append({
+                    'response_id': mine.attempt_question_id.id,
+                    'matched_response_id': theirs.attempt_question_id.id,
+                    'question_id': mine.question_id.id,
+                    'student_id': mine.student_id.id,
+                    'matched_student_id': theirs.student_id.id,
+                    'similarity': similarity * 100,
+                })
+                response_id = mine.attempt_question_id.id
+                best[response_id] = max(best[response_id], similarity * 100)
+
+        if match_vals:
+            self.env['lms.essay.match'].create(match_vals)
+            _logger.info("Essay similarity: %d near-duplicate pairs found", len(match_vals) // 2)
+
+        for response in self.browse(list(best)):
+            if best[response.id] > response.max_similarity:
+                response.max_similarity = best[response.id]
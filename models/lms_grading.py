@@ -0,0 +1,180 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import AccessError
+from collections import defaultdict
+import heapq
+
+
+class LMSCourseGraders(models.Model):
+    _inherit = 'lms.course'
+
+    grader_ids = fields.Many2many(
+        'res.partner',
+        'lms_course_grader_rel',
+        'course_id',
+        'partner_id',
+        string='Teaching Assistants',
+        domain=[('is_instructor', '=', True)],
+        help='Share the manual grading load of this course with the instructor'
+    )
+
+
+class LMSQuizAttemptGrading(models.Model):
+    _inherit = 'lms.quiz.attempt'
+
+    def _auto_grade_quiz(self):
+        super()._auto_grade_quiz()
+        self.questions.filtered(
+            lambda q: q.grading_state == 'pending' and not q.grader_id
+        )._assign_graders()
+
+
+class LMSGradingQueue(models.Model):
+    _inherit = 'lms.quiz.attempt.question'
+
+    quiz_id = fields.Many2one(
+        'lms.quiz',
+        string='Quiz',
+        related='attempt_id.quiz_id',
+        store=True,
+        index=True
+    )
+    course_id = fields.Many2one(
+        'lms.course',
+        string='Course',
+        related='attempt_id.quiz_id.course_id',
+        store=True,
+        index=True
+    )
+    student_id = fields.Many2one(
+        'res.partner',
+        string='Student',
+        related='attempt_id.student_id'
+    )
+    question_type = fields.Selection(related='question_id.question_type')
+
+    @api.model
+    def _cron_assign_grading(self):
+        """Scheduled job: hand out pending responses nobody is grading yet"""
+        self.search([
+            ('grading_state', '=', 'pending'),
+            ('grader_id', '=', False),
+        ])._assign_graders()
+
+    def _assign_graders(self):
+        """Distribute responses to the least loaded grader of their course
+
+        The current load of each grader is read once with a grouped count,
+        then responses are dealt out from a min-heap and written with one
+        write per grader.
+        """
+        if not self:
+            return
+
+        load_groups = self.read_group(
+            [('grading_state', '=', 'pending'), ('grader_id', '!=', False)],
+            ['grader_id'],
+            ['grader_id'],
+        )
+        loads = {group['grader_id'][0]: group['grader_id_count'] for group in load_groups}
+
+        by_course = defaultdict(lambda: self.browse())
+        for item in self:
+            by_course[item.course_id] |= item
+
+        assignment = defaultdict(list)
+        for course, items in by_course.items():
+            graders = course.instructor_id | course.grader_ids
+            if not graders:
+                continue
+            heap = [(loads.get(grader.id, 0), grader.id) for grader in graders]
+            heapq.heapify(heap)
+            for item in items:
+                load, grader_id = heapq.heappop(heap)
+                assignment[grader_id].append(item.id)
+                heapq.heappush(heap, (load + 1, grader_id))
+            loads.update({grader_id: load for load, grader_id in heap})
+
+        for grader_id, item_ids in assignment.items():
+            self.browse(item_ids).write({'grader_id': grader_id})
+
+    @api.model
+    def grade_batch(self, grades):
+        """Grade many responses at once
+
+        grades is a list of {'id', 'points', 'feedback'} dicts. Points are
+        clamped to the question's value and applied with a single UPDATE;
+        attempts whose last pending response was graded are finalized.
+        """
+        items = self.browse([grade['id'] for grade in grades]).exists()
+        items._check_grading_access()
+        items = items.filtered(lambda item: item.grading_state == 'pending')
+        if not items:
+            return 0
+
+        possible = {item.id: item.points_possible for item in items}
+        ids, points, feedback = [], [], []
+        for grade in grades:
+            if grade['id'] not in possible:
+                continue
+            ids.append(grade['id'])
+            points.append(min(max(float(grade.get('points') or 0.0), 0.0), possible[grade['id']]))
+            feedback.append(grade.get('feedback') or None)
+
+        self.flush_model()
+        self.env.cr.execute("""
+            UPDATE lms_quiz_attempt_question aq
+               SET points_earned = v.points,
+                   grader_feedback = COALESCE(v.feedback, aq.grader_feedback),
+                   grading_state = 'graded',
+                   graded_date = %s,
+                   write_uid = %s,
+                   write_date = %s
+              FROM (SELECT unnest(%s::int[]) AS id,
+                           unnest(%s::float8[]) AS points,
+                           unnest(%s::text[]) AS feedback) v
+             WHERE aq.id = v.id
+        """, [fields.Datetime.now(), self.env.uid, fields.Datetime.now(), ids, points, feedback])
+        self.invalidate_model(['points_earned', 'grader_feedback', 'grading_state', 'graded_date'])
+
+        items._finalize_graded_attempts()
+        return len(ids)
+
+    def action_mark_graded(self):
+        """Confirm the points entered in the grading list for the selection"""
+        self._check_grading_access()
+        pending = self.filtered(lambda item: item.grading_state == 'pending')
+        pending.write({
+            'grading_state': 'graded',
+            'graded_date': fields.Datetime.now(),
+        })
+        pending._finalize_graded_attempts()
+
+    def _check_grading_access(self):
+        if self.env.user.has_group('lms_marketplace.group_lms_manager'):
+            return
+        partner = self.env.user.partner_id
+        for item in self:
+            if item.grader_id:
+                if item.grader_id != partner:
+                    raise AccessError(_("You can only grade responses assigned to you."))
+            elif item.course_id.instructor_id != partner:
+                # Unassigned responses belong to the course instructor
+                raise AccessError(_(
+                    "Only the instructor of %s can grade its unassigned responses."
+                ) % item.course_id.name)
+
+    def _finalize_graded_attempts(self):
+        """Move attempts with no pending response left to graded"""
+        attempts = self.attempt_id.filtered(lambda a: a.state == 'submitted')
+        if not attempts:
+            return
+
+        self.flush_model(['grading_state'])
+        self.env.cr.execute("""
+            SELECT DISTINCT attempt_id
+              FROM lms_quiz_attempt_question
+             WHERE attempt_id IN %s
+               AND grading_state = 'pending'
+        """, [tuple(attempts.ids)])
+        still_pending = {row[0] for row in self.env.cr.fetchall()}
+        attempts.filtered(lambda a: a.id not in still_pending).write({'state': 'graded'})
@@ -0,0 +1,584 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import html2plaintext, plaintext2html, split_every
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+import csv
+import io
+import logging
+import tempfile
+import time
+import zipfile
+
+_logger = logging.getLogger(__name__)
+
+QUESTION_BANK_FORMATS = [
+    ('csv', 'CSV'),
+    ('gift', 'Moodle GIFT'),
+    ('qti', 'IMS QTI 2.1'),
+]
+
+CSV_HEADER = [
+    'question_ref', 'question', 'question_type', 'points',
+    'explanation', 'answer', 'is_correct', 'feedback',
+]
+
+QTI_NAMESPACE = 'http://www.imsglobal.org/xsd/imsqti_v2p1'
+
+# Questions read from the database per batch while exporting
+EXPORT_BATCH_SIZE = 1000
+
+
+class LMSQuestionBank(models.AbstractModel):
+    _name = 'lms.question.bank'
+    _description = 'LMS Question Bank Import/Export'
+
+    # ------------------------------------------------------------------
+    # Import
+    # ------------------------------------------------------------------
+
+    @api.model
+    def import_questions(self, quiz_id, stream, file_format, chunk_size=500):
+        """Import a question bank from a binary stream into a quiz
+
+        Questions are parsed lazily and created in bulk chunks, each
+        question together with its answers. The record cache is dropped
+        after each chunk so memory stays bounded on very large banks.
+        """
+        quiz = self.env['lms.quiz'].browse(quiz_id)
+        parser = getattr(self, '_parse_%s' % file_format, None)
+        if not quiz.exists() or parser is None:
+            raise UserError(_("Unsupported question bank format: %s") % file_format)
+
+        self.env['lms.question'].flush_model(['quiz_id', 'sequence'])
+        self.env.cr.execute(
+            "SELECT COALESCE(MAX(sequence), 0) FROM lms_question WHERE quiz_id = %s",
+            [quiz.id]
+        )
+        sequence = self.env.cr.fetchone()[0]
+
+        stats = {'questions': 0, 'answers': 0, 'chunks': 0}
+        started = time.monotonic()
+        for chunk in split_every(chunk_size, parser(stream)):
+            sequence = self._create_question_chunk(quiz.id, chunk, sequence, stats)
+            stats['chunks'] += 1
+            elapsed = time.monotonic() - started
+            _logger.info(
+                "Question bank import into quiz %s: %d questions, %d answers (%.0f questions/s)",
+                quiz.id, stats['questions'], stats['answers'],
+                stats['questions'] / elapsed if elapsed else 0,
+            )
+
+        stats['duration'] = time.monotonic() - started
+        return stats
+
+    def _create_question_chunk(self, quiz_id, chunk, sequence, stats):
+        # Answers are created with their question, so the answer constraint
+        # of lms.question is checked once per question on complete data
+        question_vals = []
+        answer_count = 0
+        for data in chunk:
+            sequence += 1
+            question_vals.append({
+                'quiz_id': quiz_id,
+                'sequence': sequence,
+                'name': data['name'],
+                'question_type': data['question_type'],
+                'points': data.get('points') or 1.0,
+                'explanation': data.get('explanation') or False,
+                'answers': [(0, 0, {
+                    'sequence': answer_sequence,
+                    'text': answer['text'],
+                    'is_correct': answer.get('is_correct', False),
+                    'feedback': answer.get('feedback') or False,
+                }) for answer_sequence, answer in enumerate(data['answers'], start=1)],
+            })
+            answer_count += len(data['answers'])
+
+        try:
+            questions = self.env['lms.question'].create(question_vals)
+        except ValidationError as e:
+            raise UserError(_("Questions %(first)d to %(last)d of the import are invalid: %(error)s") % {
+                'first': stats['questions'] + 1,
+                'last': stats['questions'] + len(question_vals),
+                'error': e.args[0],
+            })
+
+        stats['questions'] += len(questions)
+        stats['answers'] += answer_count
+
+        self.env.flush_all()
+        self.env.invalidate_all()
+        return sequence
+
+    def _parse_csv(self, stream):
+        """One row per answer; consecutive rows sharing a question_ref form one question"""
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig'))
+        current_ref = None
+        question = None
+        for row in reader:
+            ref = row.get('question_ref') or row.get('question')
+            if ref != current_ref:
+                if question:
+                    yield question
+                current_ref = ref
+                question = {
+                    'name': plaintext2html(row.get('question') or ''),
+                    'question_type': row.get('question_type') or 'multiple_choice',
+                    'points': float(row.get('points') or 1.0),
+                    'explanation': row.get('explanation') and plaintext2html(row['explanation']),
+                    'answers': [],
+                }
+            if row.get('answer'):
+                question['answers'].append({
+                    'text': plaintext2html(row['answer']),
+                    'is_correct': (row.get('is_correct') or '').strip().lower() in ('1', 'true', 'yes', 'x'),
+                    'feedback': row.get('feedback'),
+                })
+        if question:
+            yield question
+
+    def _parse_gift(self, stream):
+        """Moodle GIFT: one question per blank-line separated block"""
+        block = []
+        for line in io.TextIOWrapper(stream, encoding='utf-8-sig'):
+            stripped = line.strip()
+            if stripped.startswith('//'):
+                continue
+            if stripped:
+                block.append(stripped)
+            elif block:
+                question = self._parse_gift_block(' '.join(block))
+                if question:
+                    yield question
+                block = []
+        if block:
+            question = self._parse_gift_block(' '.join(block))
+            if question:
+                yield question
+
+    def _parse_gift_block(self, text):
+        if text.startswith('$CATEGORY:'):
+            return None
+
+        if text.startswith('::'):
+            end = text.find('::', 2)
+            if end != -1:
+                text = text[end + 2:].strip()
+
+        start = self._gift_find(text, '{')
+        end = self._gift_find(text, '}', start + 1) if start != -1 else -1
+        if start == -1 or end == -1:
+            # Plain description without an answer block
+            return None
+
+        stem = self._gift_unescape(text[:start] + text[end + 1:]).strip()
+        if stem.startswith('[html]'):
+            name = stem[len('[html]'):]
+        else:
+            name = plaintext2html(stem)
+        body = text[start + 1:end].strip()
+
+        question = {
+            'name': name,
+            'question_type': 'multiple_choice',
+            'points': 1.0,
+            'answers': [],
+        }
+
+        if not body:
+            question['question_type'] = 'essay'
+            return question
+
+        head = body.split('#', 1)[0].strip().upper()
+        if head in ('T', 'TRUE', 'F', 'FALSE'):
+            is_true = head.startswith('T')
+            question['question_type'] = 'true_false'
+            question['answers'] = [
+                {'text': _('True'), 'is_correct': is_true},
+                {'text': _('False'), 'is_correct': not is_true},
+            ]
+            return question
+
+        answers = self._gift_split_answers(body)
+        if answers and all(answer['is_correct'] for answer in answers):
+            if any('->' in answer['text'] for answer in answers):
+                question['question_type'] = 'matching'
+            else:
+                question['question_type'] = 'short_answer'
+        question['answers'] = answers
+        return question
+
+    def _gift_find(self, text, char, start=0):
+        """Index of the first unescaped occurrence of char"""
+        i = start
+        while i < len(text):
+            if text[i] == '\\':
+                i += 2
+                continue
+            if text[i] == char:
+                return i
+            i += 1
+        return -1
+
+    def _gift_unescape(self, text):
+        result = []
+        i = 0
+        while i < len(text):
+            if text[i] == '\\' and i + 1 < len(text):
+                result.append(text[i + 1])
+                i += 2
+            else:
+                result.append(text[i])
+                i += 1
+        return ''.join(result)
+
+    def _gift_split_answers(self, body):
+        answers = []
+        current = None
+        target = 'text'
+        i = 0
+        while i < len(body):
+            char = body[i]
+            if char == '\\' and i + 1 < len(body):
+                if current is not None:
+                    current[target] += body[i + 1]
+                i += 2
+                continue
+            if char in '=~':
+                current = {'text': '', 'feedback': '', 'is_correct': char == '='}
+                answers.append(current)
+                target = 'text'
+            elif char == '#' and current is not None:
+                target = 'feedback'
+            elif current is not None:
+                current[target] += char
+            i += 1
+
+        for answer in answers:
+            text = answer['text'].strip()
+            if text.startswith('%'):
+                # Weighted answer, e.g. ~%50%partial: any positive weight counts as correct
+                weight, _sep, text = text[1:].partition('%')
+                try:
+                    answer['is_correct'] = float(weight) > 0
+                except ValueError:
+                    pass
+            answer['text'] = text.strip()
+            answer['feedback'] = answer['feedback'].strip()
+        return [answer for answer in answers if answer['text']]
+
+    def _parse_qti(self, stream):
+        """IMS QTI 2.x: a content package (zip) or a single XML document"""
+        if zipfile.is_zipfile(stream):
+            stream.seek(0)
+            with zipfile.ZipFile(stream) as package:
+                for member in package.namelist():
+                    if not member.lower().endswith('.xml') or member.lower().endswith('imsmanifest.xml'):
+                        continue
+                    with package.open(member) as item_file:
+                        yield from self._parse_qti_document(item_file)
+        else:
+            stream.seek(0)
+            yield from self._parse_qti_document(stream)
+
+    def _parse_qti_document(self, item_file):
+        for _event, element in ElementTree.iterparse(item_file, events=('end',)):
+            if self._qti_tag(element) != 'assessmentItem':
+                continue
+            question = self._parse_qti_item(element)
+            element.clear()
+            if question:
+                yield question
+
+    def _qti_tag(self, element):
+        return element.tag.rsplit('}', 1)[-1]
+
+    def _qti_text(self, element):
+        return ' '.join(''.join(element.itertext()).split())
+
+    def _parse_qti_item(self, item):
+        correct = set()
+        points = 1.0
+        interaction = None
+        prompt_parts = []
+
+        for element in item.iter():
+            tag = self._qti_tag(element)
+            if tag == 'correctResponse':
+                correct.update(
+                    self._qti_text(value) for value in element
+                    if self._qti_tag(value) == 'value'
+                )
+            elif tag == 'outcomeDeclaration' and element.get('identifier') in ('MAXSCORE', 'SCORE'):
+                for value in element.iter():
+                    if self._qti_tag(value) == 'value':
+                        try:
+                            points = float(self._qti_text(value)) or points
+                        except ValueError:
+                            pass
+            elif tag in ('choiceInteraction', 'extendedTextInteraction',
+                         'textEntryInteraction', 'matchInteraction'):
+                interaction = element
+
+        for body in item.iter():
+            if self._qti_tag(body) != 'itemBody':
+                continue
+            for child in body:
+                if child is interaction:
+                    continue
+                prompt_parts.append(self._qti_text(child))
+            if body.text and body.text.strip():
+                prompt_parts.insert(0, body.text.strip())
+        if interaction is not None:
+            for child in interaction:
+                if self._qti_tag(child) == 'prompt':
+                    prompt_parts.append(self._qti_text(child))
+
+        stem = ' '.join(part for part in prompt_parts if part) or item.get('title') or ''
+        question = {
+            'name': plaintext2html(stem),
+            'question_type': 'multiple_choice',
+            'points': points,
+            'answers': [],
+        }
+
+        interaction_tag = interaction is not None and self._qti_tag(interaction)
+        if interaction_tag == 'choiceInteraction':
+            for choice in interaction:
+                if self._qti_tag(choice) != 'simpleChoice':
+                    continue
+                question['answers'].append({
+                    'text': plaintext2html(self._qti_text(choice)),
+                    'is_correct': choice.get('identifier') in correct,
+                })
+            labels = {html2plaintext(answer['text']).strip().lower() for answer in question['answers']}
+            if labels == {'true', 'false'}:
+                question['question_type'] = 'true_false'
+                # True first, as in GIFT imports: the export relies on it
+                question['answers'].sort(key=lambda a: html2plaintext(a['text']).strip().lower() != 'true')
+        elif interaction_tag == 'textEntryInteraction':
+            question['question_type'] = 'short_answer'
+            question['answers'] = [{'text': value, 'is_correct': True} for value in sorted(correct)]
+        elif interaction_tag == 'matchInteraction':
+            question['question_type'] = 'matching'
+            labels = {
+                choice.get('identifier'): self._qti_text(choice)
+                for choice in interaction.iter()
+                if self._qti_tag(choice) == 'simpleAssociableChoice'
+            }
+            for pair in sorted(correct):
+                source, _sep, target = pair.partition(' ')
+                question['answers'].append({
+                    'text': '%s -> %s' % (labels.get(source, source), labels.get(target, target)),
+                    'is_correct': True,
+                })
+        else:
+            question['question_type'] = 'essay'
+        return question
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    @api.model
+    def export_questions(self, quiz_id, file_format):
+        """Yield the question bank of a quiz as successive byte chunks"""
+        exporter = getattr(self, '_export_%s' % file_format, None)
+        if exporter is None:
+            raise UserError(_("Unsupported question bank format: %s") % file_format)
+        return exporter(quiz_id)
+
+    def _iter_questions(self, quiz_id):
+        """Questions of a quiz, read in id-ordered batches"""
+        last_id = 0
+        while True:
+            questions = self.env['lms.question'].search([
+                ('quiz_id', '=', quiz_id),
+                ('id', '>', last_id),
+            ], order='id', limit=EXPORT_BATCH_SIZE)
+            if not questions:
+                break
+            yield from questions
+            last_id = questions[-1].id
+            self.env.invalidate_all()
+
+    def _export_csv(self, quiz_id):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_HEADER)
+        for question in self._iter_questions(quiz_id):
+            base = [
+                question.id,
+                html2plaintext(question.name or ''),
+                question.question_type,
+                question.points,
+                html2plaintext(question.explanation or ''),
+            ]
+            if question.answers:
+                for answer in question.answers:
+                    writer.writerow(base + [
+                        html2plaintext(answer.text or ''),
+                        int(answer.is_correct),
+                        answer.feedback or '',
+                    ])
+            else:
+                writer.writerow(base + ['', '', ''])
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    def _export_gift(self, quiz_id):
+        for question in self._iter_questions(quiz_id):
+            stem = self._gift_escape(html2plaintext(question.name or ''))
+            if question.question_type == 'essay':
+                body = ''
+            elif question.question_type == 'true_false':
+                # The True answer comes first, see _parse_gift_block and _parse_qti_item
+                body = 'T' if question.answers[:1].is_correct else 'F'
+            else:
+                prefix_wrong = '~' if question.question_type == 'multiple_choice' else '='
+                body = ' '.join(
+                    '%s%s%s' % (
+                        '=' if answer.is_correct else prefix_wrong,
+                        self._gift_escape(html2plaintext(answer.text or '')),
+                        '#%s' % self._gift_escape(answer.feedback) if answer.feedback else '',
+                    )
+                    for answer in question.answers
+                )
+            yield ('::Q%d:: %s {%s}\n\n' % (question.id, stem, body)).encode('utf-8')
+
+    def _gift_escape(self, text):
+        for char in '\\~=#{}:':
+            text = text.replace(char, '\\' + char)
+        return ' '.join(text.split())
+
+    def _export_qti(self, quiz_id):
+        """QTI 2.1 content package, spooled to a temporary file then streamed"""
+        identifiers = []
+        with tempfile.TemporaryFile() as spool:
+            with zipfile.ZipFile(spool, 'w', zipfile.ZIP_DEFLATED) as package:
+                for question in self._iter_questions(quiz_id):
+                    identifier = 'Q%d' % question.id
+                    identifiers.append(identifier)
+                    package.writestr('%s.xml' % identifier, self._qti_item_xml(question, identifier))
+                package.writestr('imsmanifest.xml', self._qti_manifest_xml(identifiers))
+
+            spool.seek(0)
+            while True:
+                data = spool.read(64 * 1024)
+                if not data:
+                    break
+                yield data
+
+    def _qti_item_xml(self, question, identifier):
+        stem = escape(html2plaintext(question.name or ''))
+        if question.question_type == 'essay':
+            declaration = '<responseDeclaration identifier="RESPONSE" cardinality="single" baseType="string"/>'
+            interaction = '<extendedTextInteraction responseIdentifier="RESPONSE"><prompt>%s</prompt></extendedTextInteraction>' % stem
+        elif question.question_type == 'short_answer':
+            values = ''.join(
+                '<value>%s</value>' % escape(html2plaintext(answer.text or '').strip())
+                for answer in question.answers if answer.is_correct
+            )
+            declaration = (
+                '<responseDeclaration identifier="RESPONSE" cardinality="single" baseType="string">'
+                '<correctResponse>%s</correctResponse></responseDeclaration>' % values
+            )
+            interaction = '<p>%s</p><textEntryInteraction responseIdentifier="RESPONSE"/>' % stem
+        else:
+            correct = question.answers.filtered(lambda a: a.is_correct)
+            cardinality = 'multiple' if len(correct) > 1 else 'single'
+            values = ''.join('<value>A%d</value>' % answer.id for answer in correct)
+            declaration = (
+                '<responseDeclaration identifier="RESPONSE" cardinality="%s" baseType="identifier">'
+                '<correctResponse>%s</correctResponse></responseDeclaration>' % (cardinality, values)
+            )
+            choices = ''.join(
+                '<simpleChoice identifier="A%d">%s</simpleChoice>' % (
+                    answer.id, escape(html2plaintext(answer.text or ''))
+                )
+                for answer in question.answers
+            )
+            interaction = (
+                '<choiceInteraction responseIdentifier="RESPONSE" shuffle="false" maxChoices="%d">'
+                '<prompt>%s</prompt>%s</choiceInteraction>' % (
+                    0 if cardinality == 'multiple' else 1, stem, choices
+                )
+            )
+
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<assessmentItem xmlns="%s" identifier="%s" title=%s adaptive="false" timeDependent="false">'
+            '%s'
+            '<outcomeDeclaration identifier="SCORE" cardinality="single" baseType="float"/>'
+            '<outcomeDeclaration identifier="MAXSCORE" cardinality="single" baseType="float">'
+            '<defaultValue><value>%s</value></defaultValue></outcomeDeclaration>'
+            '<itemBody>%s</itemBody>'
+            '</assessmentItem>\n'
+        ) % (
+            QTI_NAMESPACE, identifier, quoteattr(html2plaintext(question.name or '')[:80]),
+            declaration, question.points, interaction,
+        )
+
+    def _qti_manifest_xml(self, identifiers):
+        resources = ''.join(
+            '<resource identifier="R%s" type="imsqti_item_xmlv2p1" href="%s.xml">'
+            '<file href="%s.xml"/></resource>' % (identifier, identifier, identifier)
+            for identifier in identifiers
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<manifest xmlns="http://www.imsglobal.org/xsd/imscp_v1p1" identifier="MANIFEST">'
+            '<organizations/><resources>%s</resources></manifest>\n'
+        ) % resources
+
+
+class LMSQuestionImportWizard(models.TransientModel):
+    _name = 'lms.question.import.wizard'
+    _description = 'LMS Question Bank Import Wizard'
+
+    quiz_id = fields.Many2one('lms.quiz', string='Quiz', required=True)
+    file_format = fields.Selection(
+        QUESTION_BANK_FORMATS,
+        string='Format',
+        required=True,
+        default='csv'
+    )
+    data_file = fields.Binary(string='File', required=True)
+    filename = fields.Char(string='Filename')
+    chunk_size = fields.Integer(string='Questions per Batch', default=500)
+
+    def _open_data_file(self):
+        """Binary stream over the uploaded file
+
+        The file is read straight from the filestore, so the import never
+        holds the whole bank, or its base64 encoding, in memory.
+        """
+        self.ensure_one()
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'data_file'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), 'rb')
+        # Database attachment storage
+        return io.BytesIO(attachment.raw)
+
+    def action_import(self):
+        self.ensure_one()
+        with self._open_data_file() as stream:
+            stats = self.env['lms.question.bank'].import_questions(
+                self.quiz_id.id, stream, self.file_format, chunk_size=self.chunk_size or 500
+            )
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Question Bank Imported'),
+                'message': _('Imported %(questions)d questions and %(answers)d answers in %(duration).1f seconds') % stats,
+                'type': 'success',
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
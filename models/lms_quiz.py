@@ -1,4 +1,6 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError, UserError
+from datetime import timedelta
 import random
 
 class LMSQuiz(models.Model):
@@ -25,6 +27,11 @@ class LMSQuiz(models.Model):
     
     passing_score = fields.Float(string='Passing Score (%)', default=70.0)
     time_limit = fields.Integer(string='Time Limit (minutes)')
+    submission_grace_period = fields.Integer(
+        string='Submission Grace Period (seconds)',
+        default=30,
+        help='Late submissions are still accepted for this long after the deadline'
+    )
     max_attempts = fields.Integer(string='Maximum Attempts', default=3)
     
     shuffle_questions = fields.Boolean(string='Shuffle Questions', default=True)
@@ -42,30 +49,86 @@ class LMSQuiz(models.Model):
         for quiz in self:
             quiz.question_count = len(quiz.questions)
     
+    def action_export_questions(self, file_format='gift'):
+        """Download the question bank of this quiz"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/lms/quiz/{self.id}/export/{file_format}',
+            'target': 'self',
+        }
+    
     def action_generate_quiz_attempt(self, enrollment):
-        """Generate a quiz attempt for a student"""
+        """Resume the open attempt of a student or start the next one
+
+        Attempt creation is serialized per enrollment, so parallel requests
+        (e.g. a reloaded quiz page) cannot create duplicate attempts or
+        leave gaps in the attempt numbering.
+        """
+        self.ensure_one()
+        self._lock_enrollment_attempts(enrollment)
+        
+        Attempt = self.env['lms.quiz.attempt']
+        open_attempt = Attempt.search([
+            ('quiz_id', '=', self.id),
+            ('enrollment_id', '=', enrollment.id),
+            ('state', '=', 'in_progress'),
+        ], limit=1)
+        if open_attempt:
+            return open_attempt
+        
+        last_attempt = Attempt.search([
+            ('quiz_id', '=', self.id),
+            ('enrollment_id', '=', enrollment.id),
+        ], order='attempt_number desc', limit=1)
+        attempt_number = last_attempt.attempt_number + 1
+        
+        if self.max_attempts and attempt_number > self.max_attempts:
+            raise UserError(_("You have used all %d attempts for this quiz.") % self.max_attempts)
+        
+        return Attempt.create(self._prepare_attempt_values(enrollment, attempt_number))
+    
+    def _lock_enrollment_attempts(self, enrollment):
+        """Serialize attempt creation for an enrollment
+
+        The request snapshot is taken before we get here, so a plain lock
+        would let a waiting request miss the attempt created by the one it
+        waited for. Updating the enrollment row instead makes the waiting
+        request fail with a serialization error once the first commits,
+        and Odoo retries it on a fresh snapshot.
+        """
+        self.env.cr.execute(
+            "UPDATE lms_enrollment SET id = id WHERE id = %s",
+            [enrollment.id]
+        )
+    
+    def _prepare_attempt_values(self, enrollment, attempt_number):
+        """Values of a new attempt, with its question order already drawn"""
+        self.ensure_one()
         questions = self.questions
         if self.shuffle_questions:
             questions = questions.sorted(key=lambda x: random.random())
         
         attempt_questions = []
-        for question in questions:
+        for sequence, question in enumerate(questions, start=1):
             answers = question.answers
             if self.shuffle_answers:
                 answers = answers.sorted(key=lambda x: random.random())
             
             attempt_questions.append((0, 0, {
                 'question_id': question.id,
-                'student_answers': [(6, 0, answers.ids)],
+                'sequence': sequence,
+                'answer_order': ','.join(str(answer_id) for answer_id in answers.ids),
             }))
         
-        return self.env['lms.quiz.attempt'].create({
+        return {
             'quiz_id': self.id,
             'enrollment_id': enrollment.id,
             'student_id': enrollment.student_id.id,
+            'attempt_number': attempt_number,
             'questions': attempt_questions,
             'time_limit': self.time_limit,
-        })
+        }
 
 class LMSQuestion(models.Model):
     _name = 'lms.question'
@@ -139,9 +202,50 @@ class LMSQuizAttempt(models.Model):
     
     time_spent = fields.Float(string='Time Spent (minutes)', compute='_compute_time_spent')
     time_limit = fields.Integer(string='Time Limit (minutes)')
+    deadline_at = fields.Datetime(
+        string='Deadline',
+        index=True,
+        readonly=True,
+        help='Server-side deadline derived from the start time and time limit'
+    )
+    is_expired = fields.Boolean(string='Expired', readonly=True)
+    
+    # Autosave
+    autosave_seq = fields.Integer(
+        string='Autosave Sequence',
+        readonly=True,
+        help='Highest client sequence number applied; older saves are ignored'
+    )
+    last_autosave = fields.Datetime(string='Last Autosave', readonly=True)
     
     is_passed = fields.Boolean(string='Passed', compute='_compute_is_passed')
     
+    _sql_constraints = [
+        ('attempt_number_unique', 'UNIQUE(quiz_id, enrollment_id, attempt_number)',
+         'Attempt numbers must be unique per quiz and enrollment.'),
+    ]
+    
+    def init(self):
+        # At most one open attempt per (quiz, enrollment); also serves the
+        # resume lookup when a student reloads the quiz page.
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS lms_quiz_attempt_open_unique_idx
+                ON lms_quiz_attempt (quiz_id, enrollment_id)
+             WHERE state = 'in_progress'
+        """)
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            # Prepared exam attempts get their deadline when they are claimed
+            if vals.get('state') == 'prepared':
+                continue
+            if vals.get('time_limit') and not vals.get('deadline_at'):
+                start_time = fields.Datetime.to_datetime(vals.get('start_time')) or fields.Datetime.now()
+                vals['start_time'] = start_time
+                vals['deadline_at'] = start_time + timedelta(minutes=vals['time_limit'])
+        return super().create(vals_list)
+    
     @api.depends('questions.points_earned')
     def _compute_score(self):
         for attempt in self:
@@ -167,6 +271,92 @@ class LMSQuizAttempt(models.Model):
             attempt.is_passed = attempt.score >= attempt.quiz_id.passing_score
     
     def action_submit_quiz(self):
+        self._check_submission_deadline()
+        self._finalize_attempts()
+    
+    def _check_submission_deadline(self):
+        """Reject submissions received after the deadline plus grace period"""
+        now = fields.Datetime.now()
+        for attempt in self:
+            if attempt.state != 'in_progress':
+                raise UserError(_("This quiz attempt has already been submitted."))
+            if attempt.deadline_at:
+                grace = timedelta(seconds=attempt.quiz_id.submission_grace_period)
+                if now > attempt.deadline_at + grace:
+                    raise UserError(_("The time limit for this quiz attempt has expired."))
+    
+    def _prepare_answer_commands(self, answers):
+        """One2many commands applying {question_id: answer_data} to this attempt
+
+        The question type is taken from the question itself, and selected
+        answers not belonging to the question are dropped.
+        """
+        self.ensure_one()
+        attempt_questions = {aq.question_id.id: aq for aq in self.questions}
+        
+        commands = []
+        for question_id, answer_data in answers.items():
+            attempt_question = attempt_questions.get(int(question_id))
+            if not attempt_question:
+                continue
+            
+            question = attempt_question.question_id
+            if question.question_type in ['multiple_choice', 'true_false']:
+                valid_ids = set(question.answers.ids)
+                answer_ids = [
+                    int(answer_id) for answer_id in answer_data.get('answers') or []
+                    if answer_id and int(answer_id) in valid_ids
+                ]
+                commands.append((1, attempt_question.id, {
+                    'student_answer_ids': [(6, 0, answer_ids)]
+                }))
+            else:
+                commands.append((1, attempt_question.id, {
+                    'student_essay_answer': answer_data.get('answer') or ''
+                }))
+        return commands
+    
+    def action_autosave(self, seq, answers):
+        """Apply the answers changed since the last autosave in one write
+
+        Saves carry an increasing client sequence number. A save whose
+        sequence is not newer than the last applied one arrived out of
+        order and is not applied; the reply carries the server's sequence
+        so the client can resend its answers past it.
+        """
+        self.ensure_one()
+        self._check_submission_deadline()
+        
+        # Lock the attempt row so concurrent saves are applied in order
+        self.env.cr.execute(
+            "SELECT autosave_seq FROM lms_quiz_attempt WHERE id = %s FOR UPDATE",
+            [self.id]
+        )
+        last_seq = self.env.cr.fetchone()[0] or 0
+        if seq <= last_seq:
+            return {'seq': last_seq, 'stale': True}
+        
+        now = fields.Datetime.now()
+        self.write({
+            'questions': self._prepare_answer_commands(answers),
+            'autosave_seq': seq,
+            'last_autosave': now,
+        })
+        return {'seq': seq, 'saved_at': fields.Datetime.to_string(now)}
+    
+    def get_remaining_seconds(self):
+        """Seconds left before the server-side deadline, used by the quiz page timer"""
+        self.ensure_one()
+        if not self.deadline_at:
+            return 0
+        remaining = (self.deadline_at - fields.Datetime.now()).total_seconds()
+        return max(int(remaining), 0)
+    
+    def _finalize_attempts(self):
+        """Submit, auto-grade and update progress for a batch of attempts"""
+        if not self:
+            return
+        
         self.write({
             'state': 'submitted',
             'end_time': fields.Datetime.now()
@@ -177,8 +367,8 @@ class LMSQuizAttempt(models.Model):
         
         # Update content progress if this quiz is associated with content
         content_progress = self.env['lms.content.progress'].search([
-            ('enrollment_id', '=', self.enrollment_id.id),
-            ('quiz_attempt_id', '=', self.id)
+            ('enrollment_id', 'in', self.enrollment_id.ids),
+            ('quiz_attempt_id', 'in', self.ids)
         ])
         
         if content_progress:
@@ -187,20 +377,75 @@ class LMSQuizAttempt(models.Model):
                 'completion_date': fields.Datetime.now()
             })
     
+    @api.model
+    def _cron_expire_attempts(self, batch_size=1000):
+        """Finalize in-progress attempts whose deadline has passed"""
+        now = fields.Datetime.now()
+        self.flush_model(['state', 'deadline_at'])
+        while True:
+            # The deadline_at index narrows the scan; the grace period of
+            # each quiz is applied on the joined row.
+            self.env.cr.execute("""
+                SELECT a.id
+                  FROM lms_quiz_attempt a
+                  JOIN lms_quiz q ON q.id = a.quiz_id
+                 WHERE a.state = 'in_progress'
+                   AND a.deadline_at < %s
+                   AND a.deadline_at + make_interval(secs => COALESCE(q.submission_grace_period, 0)) < %s
+              ORDER BY a.deadline_at
+                 LIMIT %s
+            """, [now, now, batch_size])
+            expired = self.browse([row[0] for row in self.env.cr.fetchall()])
+            if not expired:
+                break
+            
+            expired.write({'is_expired': True})
+            expired._finalize_attempts()
+
+            # Attempts are closed at their deadline, not when the job runs
+            self.flush_model(['end_time'])
+            self.env.cr.execute("""
+                UPDATE lms_quiz_attempt
+                   SET end_time = deadline_at
+                 WHERE id IN %s
+            """, [tuple(expired.ids)])
+            self.invalidate_model(['end_time'])
+            self.env.cr.commit()
+    
     def _auto_grade_quiz(self):
-        """Automatically grade questions that can be auto-graded"""
+        """Automatically grade questions that can be auto-graded
+
+        Other questions are queued for manual grading; their attempts stay
+        submitted until the last one is graded.
+        """
+        manual_questions = self.env['lms.quiz.attempt.question']
         for attempt_question in self.questions:
             if attempt_question.question_id.question_type in ['multiple_choice', 'true_false']:
                 attempt_question._auto_grade()
+            else:
+                manual_questions |= attempt_question
         
-        self.write({'state': 'graded'})
+        manual_questions.write({'grading_state': 'pending'})
+        (self - manual_questions.attempt_id).write({'state': 'graded'})
 
 class LMSQuizAttemptQuestion(models.Model):
     _name = 'lms.quiz.attempt.question'
     _description = 'LMS Quiz Attempt Question'
+    _order = 'sequence, id'
     
-    attempt_id = fields.Many2one('lms.quiz.attempt', string='Attempt', required=True)
+    attempt_id = fields.Many2one(
+        'lms.quiz.attempt',
+        string='Attempt',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
     question_id = fields.Many2one('lms.question', string='Question', required=True)
+    sequence = fields.Integer(string='Sequence', default=10)
+    answer_order = fields.Char(
+        string='Answer Order',
+        help='Comma-separated answer ids in the order shown to the student'
+    )
     
     student_answer_ids = fields.Many2many(
         'lms.answer',
@@ -212,6 +457,21 @@ class LMSQuizAttemptQuestion(models.Model):
     
     student_essay_answer = fields.Text(string='Essay Answer')
     
+    # Manual grading
+    grading_state = fields.Selection([
+        ('not_required', 'Not Required'),
+        ('pending', 'Pending'),
+        ('graded', 'Graded'),
+    ], string='Grading Status', default='not_required', index=True)
+    grader_id = fields.Many2one(
+        'res.partner',
+        string='Grader',
+        index=True,
+        domain=[('is_instructor', '=', True)]
+    )
+    graded_date = fields.Datetime(string='Graded On')
+    grader_feedback = fields.Text(string='Grader Feedback')
+    
     points_possible = fields.Float(
         string='Possible Points', 
         related='question_id.points'
@@ -237,6 +497,15 @@ class LMSQuizAttemptQuestion(models.Model):
             else:
                 attempt_question.is_correct = attempt_question.points_earned > 0
     
+    def get_ordered_answers(self):
+        """Answers of the question in the order drawn for this attempt"""
+        self.ensure_one()
+        answers = self.question_id.answers
+        if not self.answer_order:
+            return answers
+        order = {int(answer_id): i for i, answer_id in enumerate(self.answer_order.split(','))}
+        return answers.sorted(key=lambda a: order.get(a.id, len(order)))
+    
     def _auto_grade(self):
         """Auto-grade multiple choice and true/false questions"""
         if self.question_id.question_type in ['multiple_choice', 'true_false']:
@@ -0,0 +1,277 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+import json
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_logger = logging.getLogger(__name__)
+
+# Attempts folded into the running statistics per chunk. Only the
+# sufficient statistics survive between chunks, so memory stays bounded
+# whatever the number of attempts on a quiz.
+ITEM_ANALYSIS_CHUNK_SIZE = 5000
+
+
+class LMSQuizItemAnalysis(models.Model):
+    _inherit = 'lms.quiz'
+
+    cronbach_alpha = fields.Float(
+        string="Cronbach's Alpha",
+        readonly=True,
+        digits=(16, 3),
+        help='Internal consistency of the quiz, computed over graded attempts'
+    )
+    analysis_attempt_count = fields.Integer(
+        string='Analyzed Attempts',
+        readonly=True
+    )
+    analysis_date = fields.Datetime(string='Last Item Analysis', readonly=True)
+    item_analysis_data = fields.Text(
+        string='Item Analysis Accumulators',
+        readonly=True,
+        copy=False,
+        help='Running sums used to update the item statistics incrementally'
+    )
+
+    def action_run_item_analysis(self):
+        """Fold newly graded attempts into the item statistics"""
+        self._run_item_analysis()
+
+    def action_reset_item_analysis(self):
+        """Drop the accumulated statistics and rebuild them from scratch"""
+        attempts = self.env['lms.quiz.attempt'].search([
+            ('quiz_id', 'in', self.ids),
+            ('item_analyzed', '=', True),
+        ])
+        attempts.write({'item_analyzed': False})
+        self.write({
+            'item_analysis_data': False,
+            'analysis_attempt_count': 0,
+            'cronbach_alpha': 0.0,
+        })
+        self._run_item_analysis()
+
+    @api.model
+    def _cron_item_analysis(self):
+        """Scheduled job: analyze quizzes that received graded attempts"""
+        self.env['lms.quiz.attempt'].flush_model(['quiz_id', 'state', 'item_analyzed'])
+        self.env.cr.execute("""
+            SELECT DISTINCT quiz_id
+              FROM lms_quiz_attempt
+             WHERE state = 'graded'
+               AND item_analyzed IS NOT TRUE
+        """)
+        quiz_ids = [row[0] for row in self.env.cr.fetchall()]
+        for quiz in self.browse(quiz_ids):
+            quiz._run_item_analysis()
+            # Each quiz is committed separately so a long run keeps its progress
+            self.env.cr.commit()
+
+    def _run_item_analysis(self):
+        if np is None:
+            raise UserError(_("Item analysis requires the numpy Python package."))
+
+        Attempt = self.env['lms.quiz.attempt']
+        for quiz in self:
+            accumulators = quiz._load_item_accumulators()
+            processed = 0
+            while True:
+                attempts = Attempt.search([
+                    ('quiz_id', '=', quiz.id),
+                    ('state', '=', 'graded'),
+                    ('item_analyzed', '=', False),
+                ], order='id', limit=ITEM_ANALYSIS_CHUNK_SIZE)
+                if not attempts:
+                    break
+
+                quiz._accumulate_item_chunk(attempts.ids, accumulators)
+                attempts.write({'item_analyzed': True})
+                processed += len(attempts)
+
+            if processed:
+                quiz._store_item_snapshot(accumulators)
+                _logger.info(
+                    "Item analysis for quiz %s: %d new attempts, %d total",
+                    quiz.id, processed, accumulators['n'],
+                )
+
+    def _load_item_accumulators(self):
+        self.ensure_one()
+        if self.item_analysis_data:
+            return json.loads(self.item_analysis_data)
+        return {'n': 0, 'sum_y': 0.0, 'sum_y2': 0.0, 'items': {}, 'answers': {}}
+
+    def _accumulate_item_chunk(self, attempt_ids, accumulators):
+        """Build the student-by-question matrix for a chunk and fold it in
+
+        Item scores are normalized to [0, 1]. Questions missing from an
+        attempt (e.g. drawn from a pool) are NaN and ignored pairwise.
+        """
+        self.ensure_one()
+        cr = self.env.cr
+        self.env['lms.quiz.attempt.question'].flush_model()
+        self.env['lms.question'].flush_model(['points'])
+
+        cr.execute("""
+            SELECT aq.attempt_id, aq.question_id, aq.points_earned, q.points
+              FROM lms_quiz_attempt_question aq
+              JOIN lms_question q ON q.id = aq.question_id
+             WHERE aq.attempt_id IN %s
+        """, [tuple(attempt_ids)])
+        rows = cr.fetchall()
+        if not rows:
+            return
+
+        row_index = {attempt_id: i for i, attempt_id in enumerate(attempt_ids)}
+        question_ids = sorted({row[1] for row in rows})
+        col_index = {question_id: j for j, question_id in enumerate(question_ids)}
+
+        matrix = np.full((len(attempt_ids), len(question_ids)), np.nan)
+        for attempt_id, question_id, earned, possible in rows:
+            score = (earned or 0.0) / possible if possible else 0.0
+            matrix[row_index[attempt_id], col_index[question_id]] = min(max(score, 0.0), 1.0)
+
+        answered = ~np.isnan(matrix)
+        scores = np.where(answered, matrix, 0.0)
+        totals = scores.sum(axis=1)
+        has_items = answered.any(axis=1)
+
+        accumulators['n'] += int(has_items.sum())
+        accumulators['sum_y'] += float(totals[has_items].sum())
+        accumulators['sum_y2'] += float((totals[has_items] ** 2).sum())
+
+        n_items = answered.sum(axis=0)
+        sum_x = scores.sum(axis=0)
+        sum_x2 = (scores ** 2).sum(axis=0)
+        masked_totals = answered * totals[:, None]
+        sum_y = masked_totals.sum(axis=0)
+        sum_y2 = (masked_totals ** 2).sum(axis=0)
+        sum_xy = (scores * masked_totals).sum(axis=0)
+
+        items = accumulators['items']
+        for question_id, j in col_index.items():
+            item = items.setdefault(str(question_id), {
+                'n': 0, 'sum_x': 0.0, 'sum_x2': 0.0,
+                'sum_y': 0.0, 'sum_y2': 0.0, 'sum_xy': 0.0,
+            })
+            item['n'] += int(n_items[j])
+            item['sum_x'] += float(sum_x[j])
+            item['sum_x2'] += float(sum_x2[j])
+            item['sum_y'] += float(sum_y[j])
+            item['sum_y2'] += float(sum_y2[j])
+            item['sum_xy'] += float(sum_xy[j])
+
+        # Distractor selection counts
+        cr.execute("""
+            SELECT rel.answer_id, COUNT(*)
+              FROM quiz_attempt_answer_rel rel
+              JOIN lms_quiz_attempt_question aq ON aq.id = rel.attempt_question_id
+             WHERE aq.attempt_id IN %s
+          GROUP BY rel.answer_id
+        """, [tuple(attempt_ids)])
+        answers = accumulators['answers']
+        for answer_id, count in cr.fetchall():
+            answers[str(answer_id)] = answers.get(str(answer_id), 0) + count
+
+    def _store_item_snapshot(self, accumulators):
+        """Derive difficulty, discrimination and alpha from the running sums"""
+        self.ensure_one()
+        now = fields.Datetime.now()
+        item_variances = []
+
+        questions = self.env['lms.question'].browse(
+            [int(question_id) for question_id in accumulators['items']]
+        ).exists()
+        for question in questions:
+            item = accumulators['items'][str(question.id)]
+            n = item['n']
+            if not n:
+                continue
+
+            p_value = item['sum_x'] / n
+            var_x = max(item['sum_x2'] / n - p_value ** 2, 0.0)
+            item_variances.append(var_x)
+
+            # Corrected item-total correlation: the item is removed from the
+            # total so it does not correlate with itself.
+            sum_r = item['sum_y'] - item['sum_x']
+            sum_r2 = item['sum_y2'] - 2 * item['sum_xy'] + item['sum_x2']
+            sum_xr = item['sum_xy'] - item['sum_x2']
+            mean_r = sum_r / n
+            var_r = max(sum_r2 / n - mean_r ** 2, 0.0)
+            covariance = sum_xr / n - p_value * mean_r
+            if var_x > 0 and var_r > 0:
+                discrimination = covariance / (var_x * var_r) ** 0.5
+            else:
+                discrimination = 0.0
+
+            question.write({
+                'difficulty_index': p_value,
+                'discrimination_index': discrimination,
+                'analysis_attempt_count': n,
+                'analysis_date': now,
+            })
+
+            for answer in question.answers:
+                selected = accumulators['answers'].get(str(answer.id), 0)
+                answer.selection_rate = selected / n * 100
+
+        alpha = 0.0
+        total_n = accumulators['n']
+        k = len(item_variances)
+        if total_n and k > 1:
+            mean_y = accumulators['sum_y'] / total_n
+            var_y = accumulators['sum_y2'] / total_n - mean_y ** 2
+            if var_y > 0:
+                alpha = k / (k - 1) * (1 - sum(item_variances) / var_y)
+
+        self.write({
+            'cronbach_alpha': alpha,
+            'analysis_attempt_count': total_n,
+            'analysis_date': now,
+            'item_analysis_data': json.dumps(accumulators),
+        })
+
+
+class LMSQuestionItemAnalysis(models.Model):
+    _inherit = 'lms.question'
+
+    difficulty_index = fields.Float(
+        string='Difficulty (p-value)',
+        readonly=True,
+        digits=(16, 3),
+        help='Average normalized score on this question; low values mean hard questions'
+    )
+    discrimination_index = fields.Float(
+        string='Discrimination',
+        readonly=True,
+        digits=(16, 3),
+        help='Point-biserial correlation between this question and the rest of the quiz'
+    )
+    analysis_attempt_count = fields.Integer(string='Analyzed Attempts', readonly=True)
+    analysis_date = fields.Datetime(string='Last Item Analysis', readonly=True)
+
+
+class LMSAnswerItemAnalysis(models.Model):
+    _inherit = 'lms.answer'
+
+    selection_rate = fields.Float(
+        string='Selection Rate (%)',
+        readonly=True,
+        help='Share of analyzed attempts that selected this answer'
+    )
+
+
+class LMSQuizAttemptItemAnalysis(models.Model):
+    _inherit = 'lms.quiz.attempt'
+
+    item_analyzed = fields.Boolean(
+        string='Included in Item Analysis',
+        default=False,
+        copy=False,
+        index=True
+    )
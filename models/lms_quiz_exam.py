@@ -0,0 +1,167 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError, UserError
+from odoo.tools import split_every
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Prepared attempts created per transaction by the pool job
+EXAM_POOL_CHUNK_SIZE = 500
+
+
+class LMSQuizExamWindow(models.Model):
+    _inherit = 'lms.quiz'
+
+    exam_window = fields.Boolean(
+        string='Scheduled Exam Window',
+        help='Attempts are prepared ahead of the start time and claimed when the exam opens'
+    )
+    exam_start = fields.Datetime(string='Exam Opens At')
+    exam_end = fields.Datetime(string='Exam Closes At')
+    exam_prepare_hours = fields.Integer(
+        string='Prepare Attempts (hours before)',
+        default=12,
+        help='How long before the exam opens attempts start being pre-generated'
+    )
+    exam_pool_date = fields.Datetime(string='Last Pool Preparation', readonly=True)
+
+    @api.constrains('exam_window', 'exam_start', 'exam_end')
+    def _check_exam_window(self):
+        for quiz in self:
+            if not quiz.exam_window:
+                continue
+            if not quiz.exam_start:
+                raise ValidationError(_("A scheduled exam needs an opening time."))
+            if quiz.exam_end and quiz.exam_end <= quiz.exam_start:
+                raise ValidationError(_("The exam must close after it opens."))
+
+    def action_generate_quiz_attempt(self, enrollment):
+        """Claim a prepared attempt when the quiz runs as a scheduled exam"""
+        self.ensure_one()
+        if not self.exam_window:
+            return super().action_generate_quiz_attempt(enrollment)
+
+        now = fields.Datetime.now()
+        if self.exam_start and now < self.exam_start:
+            raise UserError(_("This exam has not opened yet."))
+        if self.exam_end and now > self.exam_end:
+            raise UserError(_("This exam is closed."))
+
+        self._lock_enrollment_attempts(enrollment)
+        Attempt = self.env['lms.quiz.attempt']
+        attempt = Attempt.search([
+            ('quiz_id', '=', self.id),
+            ('enrollment_id', '=', enrollment.id),
+            ('state', 'in', ('in_progress', 'prepared')),
+        ], order='state', limit=1)
+        if attempt.state == 'prepared':
+            attempt._claim_prepared_attempt()
+            return attempt
+        if attempt:
+            return attempt
+
+        # Late registration: no prepared attempt, fall back to generating one
+        return super().action_generate_quiz_attempt(enrollment)
+
+    def action_prepare_exam_pool(self):
+        """Pre-generate attempts for every registered enrollment now"""
+        for quiz in self:
+            quiz._prepare_exam_pool()
+
+    @api.model
+    def _cron_prepare_exam_pools(self):
+        """Scheduled job: fill upcoming exam pools and drop unclaimed ones"""
+        now = fields.Datetime.now()
+        upcoming = self.search([
+            ('exam_window', '=', True),
+            ('exam_start', '>', now),
+        ])
+        for quiz in upcoming:
+            if quiz.exam_start - timedelta(hours=quiz.exam_prepare_hours) <= now:
+                quiz._prepare_exam_pool(commit=True)
+
+        # Unclaimed attempts of closed exams are never going to be used
+        stale = self.env['lms.quiz.attempt'].search([
+            ('state', '=', 'prepared'),
+            ('quiz_id.exam_end', '<', now),
+        ])
+        stale.unlink()
+
+    def _prepare_exam_pool(self, commit=False):
+        """Create prepared attempts for registered enrollments lacking one
+
+        Enrollments already holding an open or prepared attempt are
+        excluded with an anti-join, so the job is safe to re-run and picks
+        up late registrations.
+        """
+        self.ensure_one()
+        self.env['lms.quiz.attempt'].flush_model(['quiz_id', 'enrollment_id', 'state', 'attempt_number'])
+        self.env['lms.enrollment'].flush_model(['course_id', 'state'])
+        self.env.cr.execute("""
+            SELECT e.id,
+                   COALESCE((SELECT MAX(a.attempt_number)
+                               FROM lms_quiz_attempt a
+                              WHERE a.quiz_id = %(quiz)s
+                                AND a.enrollment_id = e.id), 0)
+              FROM lms_enrollment e
+             WHERE e.course_id = %(course)s
+               AND e.state = 'in_progress'
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM lms_quiz_attempt a
+                     WHERE a.quiz_id = %(quiz)s
+                       AND a.enrollment_id = e.id
+                       AND a.state IN ('prepared', 'in_progress')
+               )
+        """, {'quiz': self.id, 'course': self.course_id.id})
+        pending = [
+            (enrollment_id, last_number + 1)
+            for enrollment_id, last_number in self.env.cr.fetchall()
+            if not self.max_attempts or last_number < self.max_attempts
+        ]
+
+        Attempt = self.env['lms.quiz.attempt']
+        created = 0
+        for chunk in split_every(EXAM_POOL_CHUNK_SIZE, pending):
+            enrollments = self.env['lms.enrollment'].browse([enrollment_id for enrollment_id, _number in chunk])
+            vals_list = []
+            for enrollment, (_enrollment_id, attempt_number) in zip(enrollments, chunk):
+                vals = self._prepare_attempt_values(enrollment, attempt_number)
+                vals['state'] = 'prepared'
+                vals_list.append(vals)
+            Attempt.create(vals_list)
+            created += len(vals_list)
+            if commit:
+                self.env.cr.commit()
+
+        self.exam_pool_date = fields.Datetime.now()
+        _logger.info("Exam pool for quiz %s: %d attempts prepared", self.id, created)
+        return created
+
+
+class LMSQuizAttemptExamWindow(models.Model):
+    _inherit = 'lms.quiz.attempt'
+
+    state = fields.Selection(
+        selection_add=[('prepared', 'Prepared'), ('in_progress',)],
+        ondelete={'prepared': 'cascade'}
+    )
+
+    def _claim_prepared_attempt(self):
+        """Turn a prepared attempt into the running attempt of its student"""
+        now = fields.Datetime.now()
+        for attempt in self:
+            quiz = attempt.quiz_id
+            deadline = False
+            if quiz.time_limit:
+                deadline = now + timedelta(minutes=quiz.time_limit)
+                if quiz.exam_end:
+                    deadline = min(deadline, quiz.exam_end)
+            elif quiz.exam_end:
+                deadline = quiz.exam_end
+            attempt.write({
+                'state': 'in_progress',
+                'start_time': now,
+                'deadline_at': deadline,
+            })
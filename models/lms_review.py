@@ -0,0 +1,225 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import AccessError
+from datetime import timedelta
+
+# SM-2 scheduling constants
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+PASSING_QUALITY = 3
+
+
+def _sm2(quality, ease, interval, repetitions):
+    """Next (ease, interval in days, repetitions) for a review graded 0-5"""
+    if quality >= PASSING_QUALITY:
+        if repetitions == 0:
+            interval = 1
+        elif repetitions == 1:
+            interval = 6
+        else:
+            interval = max(int(round(interval * ease)), interval + 1)
+        repetitions += 1
+    else:
+        interval = 1
+        repetitions = 0
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return ease, interval, repetitions
+
+
+class LMSReviewItem(models.Model):
+    _name = 'lms.review.item'
+    _description = 'LMS Spaced Repetition Review Item'
+    _order = 'due_date, id'
+
+    student_id = fields.Many2one('res.partner', string='Student', required=True, ondelete='cascade')
+    question_id = fields.Many2one('lms.question', string='Question', required=True, ondelete='cascade')
+    course_id = fields.Many2one('lms.course', string='Course', index=True)
+    source_attempt_question_id = fields.Many2one(
+        'lms.quiz.attempt.question',
+        string='Missed In',
+        ondelete='set null'
+    )
+
+    ease_factor = fields.Float(string='Ease Factor', default=DEFAULT_EASE)
+    interval_days = fields.Integer(string='Interval (days)', default=0)
+    repetitions = fields.Integer(string='Successful Reviews', default=0)
+    lapses = fields.Integer(string='Lapses', default=0)
+    due_date = fields.Datetime(string='Due', required=True, default=fields.Datetime.now)
+    last_review_date = fields.Datetime(string='Last Review')
+    active = fields.Boolean(default=True)
+
+    _sql_constraints = [
+        ('student_question_unique', 'UNIQUE(student_id, question_id)',
+         'A question is scheduled only once per learner.'),
+    ]
+
+    def init(self):
+        # "What is due for this learner" is a single range scan on this index
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS lms_review_item_student_due_idx
+                ON lms_review_item (student_id, due_date)
+             WHERE active
+        """)
+
+    @api.model
+    def _schedule_missed(self, attempt_questions):
+        """Create review items for missed responses, or reset existing ones
+
+        A single upsert handles the whole batch: a question missed again
+        counts as a lapse and comes back the next day.
+        """
+        missed = attempt_questions.filtered(
+            lambda item: item.points_earned < item.points_possible
+        )
+        if not missed:
+            return
+
+        rows = {}
+        for item in missed:
+            # Latest response wins when a batch holds the same question twice
+            rows[(item.attempt_id.student_id.id, item.question_id.id)] = (
+                item.attempt_id.quiz_id.course_id.id or None, item.id
+            )
+        student_ids, question_ids, course_ids, source_ids = [], [], [], []
+        for (student_id, question_id), (course_id, source_id) in rows.items():
+            student_ids.append(student_id)
+            question_ids.append(question_id)
+            course_ids.append(course_id)
+            source_ids.append(source_id)
+
+        now = fields.Datetime.now()
+        self.flush_model()
+        self.env.cr.execute("""
+            INSERT INTO lms_review_item (
+                student_id, question_id, course_id, source_attempt_question_id,
+                ease_factor, interval_days, repetitions, lapses, due_date, active,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT v.student_id, v.question_id, v.course_id, v.source_id,
+                   %(ease)s, 1, 0, 0, %(due)s, TRUE,
+                   %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM (SELECT unnest(%(students)s::int[]) AS student_id,
+                           unnest(%(questions)s::int[]) AS question_id,
+                           unnest(%(courses)s::int[]) AS course_id,
+                           unnest(%(sources)s::int[]) AS source_id) v
+            ON CONFLICT (student_id, question_id) DO UPDATE
+               SET source_attempt_question_id = EXCLUDED.source_attempt_question_id,
+                   ease_factor = GREATEST(lms_review_item.ease_factor - 0.2, %(min_ease)s),
+                   interval_days = 1,
+                   repetitions = 0,
+                   lapses = lms_review_item.lapses + 1,
+                   due_date = LEAST(lms_review_item.due_date, EXCLUDED.due_date),
+                   active = TRUE,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """, {
+            'ease': DEFAULT_EASE,
+            'min_ease': MIN_EASE,
+            'due': now + timedelta(days=1),
+            'uid': self.env.uid,
+            'now': now,
+            'students': student_ids,
+            'questions': question_ids,
+            'courses': course_ids,
+            'sources': source_ids,
+        })
+        self.invalidate_model()
+
+    @api.model
+    def get_due_items(self, student=None, limit=20):
+        """Review items due now for a learner, oldest first"""
+        student = student or self.env.user.partner_id
+        return self.search([
+            ('student_id', '=', student.id),
+            ('due_date', '<=', fields.Datetime.now()),
+        ], order='due_date', limit=limit)
+
+    @api.model
+    def review_batch(self, reviews):
+        """Grade a review session and reschedule its items
+
+        reviews is a list of {'id', 'answer_ids'} or {'id', 'quality'}
+        dicts. Choice questions are graded from the selected answers; other
+        questions use the learner's own 0-5 rating. All items are updated
+        with a single UPDATE.
+        """
+        items = self.browse([review['id'] for review in reviews]).exists()
+        partner = self.env.user.partner_id
+        if any(item.student_id != partner for item in items):
+            raise AccessError(_("You can only review your own questions."))
+
+        now = fields.Datetime.now()
+        by_id = {item.id: item for item in items}
+        ids, eases, intervals, repetitions, lapses, due_dates = [], [], [], [], [], []
+        results = []
+        for review in reviews:
+            item = by_id.get(review['id'])
+            if not item:
+                continue
+            # Ownership checked above; students cannot read questions and answers
+            question = item.sudo().question_id
+            if question.question_type in ('multiple_choice', 'true_false') and 'answer_ids' in review:
+                selected = set(int(answer_id) for answer_id in review['answer_ids'] or [])
+                correct = set(question.answers.filtered(lambda a: a.is_correct).ids)
+                quality = 4 if selected == correct else 1
+            else:
+                quality = min(max(int(review.get('quality') or 0), 0), 5)
+
+            ease, interval, reps = _sm2(quality, item.ease_factor, item.interval_days, item.repetitions)
+            ids.append(item.id)
+            eases.append(ease)
+            intervals.append(interval)
+            repetitions.append(reps)
+            lapses.append(item.lapses + (1 if quality < PASSING_QUALITY else 0))
+            due_dates.append(now + timedelta(days=interval))
+            results.append({
+                'id': item.id,
+                'correct': quality >= PASSING_QUALITY,
+                'interval_days': interval,
+                'due_date': fields.Datetime.to_string(due_dates[-1]),
+            })
+
+        if not ids:
+            return results
+
+        self.flush_model()
+        self.env.cr.execute("""
+            UPDATE lms_review_item r
+               SET ease_factor = v.ease,
+                   interval_days = v.interval_days,
+                   repetitions = v.repetitions,
+                   lapses = v.lapses,
+                   due_date = v.due_date,
+                   last_review_date = %s,
+                   write_uid = %s,
+                   write_date = %s
+              FROM (SELECT unnest(%s::int[]) AS id,
+                           unnest(%s::float8[]) AS ease,
+                           unnest(%s::int[]) AS interval_days,
+                           unnest(%s::int[]) AS repetitions,
+                           unnest(%s::int[]) AS lapses,
+                           unnest(%s::timestamp[]) AS due_date) v
+             WHERE r.id = v.id
+        """, [now, self.env.uid, now, ids, eases, intervals, repetitions, lapses, due_dates])
+        self.invalidate_model()
+        return results
+
+
+class LMSQuizAttemptReview(models.Model):
+    _inherit = 'lms.quiz.attempt'
+
+    def _auto_grade_quiz(self):
+        super()._auto_grade_quiz()
+        self.env['lms.review.item']._schedule_missed(
+            self.questions.filtered(lambda q: q.grading_state == 'not_required')
+        )
+
+
+class LMSAttemptQuestionReview(models.Model):
+    _inherit = 'lms.quiz.attempt.question'
+
+    def _finalize_graded_attempts(self):
+        # Manually graded responses join the review queue once graded
+        self.env['lms.review.item']._schedule_missed(
+            self.filtered(lambda q: q.grading_state == 'graded')
+        )
+        super()._finalize_graded_attempts()
@@ -0,0 +1,149 @@
+/* LMS quiz autosave
+ *
+ * Watches the quiz form and, once the student pauses, sends only the
+ * answers that changed since the last successful save. Every save carries
+ * an increasing sequence number so the server can ignore requests that
+ * arrive out of order. At most one save is in flight at a time.
+ */
+(function () {
+    'use strict';
+
+    const DEBOUNCE_DELAY = 2000;
+    const MAX_RETRY_DELAY = 30000;
+
+    class QuizAutosave {
+        constructor(form) {
+            this.form = form;
+            this.attemptId = parseInt(form.dataset.attemptId);
+            this.seq = parseInt(form.dataset.autosaveSeq) || 0;
+            this.dirty = new Set();
+            this.saved = {};
+            this.timer = null;
+            this.inFlight = false;
+            this.stopped = false;
+            this.retryDelay = DEBOUNCE_DELAY;
+
+            form.querySelectorAll('.question-card').forEach((card) => {
+                const questionId = card.dataset.questionId;
+                this.saved[questionId] = JSON.stringify(this.collect(card));
+            });
+
+            form.addEventListener('change', (ev) => this.onEdit(ev));
+            form.addEventListener('input', (ev) => this.onEdit(ev));
+            window.addEventListener('beforeunload', () => this.flush());
+        }
+
+        onEdit(ev) {
+            if (this.stopped) {
+                return;
+            }
+            const card = ev.target.closest('.question-card');
+            if (!card) {
+                return;
+            }
+            this.dirty.add(card.dataset.questionId);
+            this.schedule(DEBOUNCE_DELAY);
+        }
+
+        schedule(delay) {
+            if (this.inFlight) {
+                // Picked up when the running save completes
+                return;
+            }
+            clearTimeout(this.timer);
+            this.timer = setTimeout(() => this.flush(), delay);
+        }
+
+        collect(card) {
+            const name = 'question_' + card.dataset.questionId;
+            const textarea = card.querySelector('textarea[name="' + name + '"]');
+            if (textarea) {
+                return {answer: textarea.value};
+            }
+            const checked = card.querySelectorAll('input[name="' + name + '"]:checked');
+            return {answers: Array.from(checked).map((input) => parseInt(input.value))};
+        }
+
+        changes() {
+            const answers = {};
+            this.dirty.forEach((questionId) => {
+                const card = this.form.querySelector('.question-card[data-question-id="' + questionId + '"]');
+                const value = this.collect(card);
+                if (JSON.stringify(value) !== this.saved[questionId]) {
+                    answers[questionId] = value;
+                }
+            });
+            return answers;
+        }
+
+        flush() {
+            clearTimeout(this.timer);
+            this.timer = null;
+            if (this.inFlight || this.stopped) {
+                return;
+            }
+            const answers = this.changes();
+            this.dirty.clear();
+            if (!Object.keys(answers).length) {
+                return;
+            }
+
+            this.inFlight = true;
+            this.seq += 1;
+            fetch('/lms/quiz/autosave', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                keepalive: true,
+                body: JSON.stringify({
+                    jsonrpc: '2.0',
+                    method: 'call',
+                    params: {attempt_id: this.attemptId, seq: this.seq, answers: answers},
+                }),
+            })
+            .then((response) => response.json())
+            .then((data) => {
+                const result = data.result || {};
+                if (result.stale) {
+                    // The server already applied a later sequence (another
+                    // tab or a reloaded page): jump past it and resend
+                    Object.keys(answers).forEach((questionId) => this.dirty.add(questionId));
+                    this.seq = Math.max(this.seq, result.seq || 0);
+                    this.retryDelay = 0;
+                    return;
+                }
+                if (!result.success) {
+                    // Deadline passed or attempt closed: stop saving
+                    this.stopped = true;
+                    this.dirty.clear();
+                    return;
+                }
+                this.seq = Math.max(this.seq, result.seq);
+                Object.keys(answers).forEach((questionId) => {
+                    this.saved[questionId] = JSON.stringify(answers[questionId]);
+                });
+                this.retryDelay = DEBOUNCE_DELAY;
+            })
+            .catch(() => {
+                // Connection dropped: keep the changes and retry with backoff
+                Object.keys(answers).forEach((questionId) => this.dirty.add(questionId));
+                this.retryDelay = Math.min(this.retryDelay * 2, MAX_RETRY_DELAY);
+            })
+            .finally(() => {
+                this.inFlight = false;
+                if (this.dirty.size && !this.stopped) {
+                    this.schedule(this.retryDelay);
+                }
+                if (!this.retryDelay) {
+                    this.retryDelay = DEBOUNCE_DELAY;
+                }
+            });
+        }
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        const form = document.getElementById('quizForm');
+        if (form && form.dataset.attemptId) {
+            window.lmsQuizAutosave = new QuizAutosave(form);
+        }
+    });
+})();
@@ -0,0 +1 @@
+from . import test_review_access
@@ -0,0 +1,64 @@
+import json
+
+from odoo.tests import HttpCase, new_test_user, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestReviewAccess(HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.student = new_test_user(
+            cls.env, login='lms_review_student',
+            groups='base.group_user,lms_marketplace.group_lms_student',
+        )
+        instructor = cls.env['res.partner'].create({'name': 'Review Instructor'})
+        course = cls.env['lms.course'].create({'name': 'Review Course', 'instructor_id': instructor.id})
+        quiz = cls.env['lms.quiz'].create({'name': 'Review Quiz'})
+        cls.question = cls.env['lms.question'].create({
+            'quiz_id': quiz.id,
+            'name': 'Is the sky blue?',
+            'question_type': 'true_false',
+            'answers': [
+                (0, 0, {'text': 'True', 'is_correct': True}),
+                (0, 0, {'text': 'False', 'is_correct': False}),
+            ],
+        })
+        cls.item = cls.env['lms.review.item'].create({
+            'student_id': cls.student.partner_id.id,
+            'question_id': cls.question.id,
+            'course_id': course.id,
+        })
+
+    def _json_call(self, url, params):
+        response = self.url_open(url, data=json.dumps({
+            'jsonrpc': '2.0',
+            'method': 'call',
+            'params': params,
+        }), headers={'Content-Type': 'application/json'})
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertNotIn('error', payload, payload.get('error'))
+        return payload['result']
+
+    def test_student_reads_due_items(self):
+        self.authenticate('lms_review_student', 'lms_review_student')
+        result = self._json_call('/lms/review/due', {})
+        self.assertTrue(result['success'])
+        self.assertEqual([item['id'] for item in result['items']], [self.item.id])
+        answers = result['items'][0]['answers']
+        self.assertEqual(len(answers), 2)
+        for answer in answers:
+            self.assertEqual(set(answer), {'id', 'text'})
+
+    def test_student_submits_review(self):
+        self.authenticate('lms_review_student', 'lms_review_student')
+        correct = self.question.answers.filtered('is_correct')
+        result = self._json_call('/lms/review/submit', {
+            'reviews': [{'id': self.item.id, 'answer_ids': correct.ids}],
+        })
+        self.assertTrue(result['success'])
+        self.assertTrue(result['results'][0]['correct'])
+        self.item.invalidate_recordset()
+        self.assertEqual(self.item.repetitions, 1)